@@ -0,0 +1,88 @@
+import asyncio
+import statistics
+import time
+from benchmarks.catalog import make_catalog, make_suppliers
+
+ENDPOINTS = [
+    ("GET", "/api/items?limit=100", None),
+    ("GET", "/api/reorder/alerts", None),
+    ("GET", "/api/reorder/top?k=20", None),
+    ("GET", "/api/variance/report", None),
+    ("GET", "/api/dashboard/overview", None),
+    ("POST", "/api/simulation/reorder", {"item_id": 1, "consumption_increase": 10, "lead_time_increase": 2, "rate_increase": 5}),
+]
+
+
+async def _load(app, size: int, requests: int, concurrency: int) -> list:
+    import httpx
+    import crud
+    from database import items_col, suppliers_col
+    from indexes import ensure_indexes
+
+    # Mirror the lifespan hook minus seeding, on a catalog of the requested size
+    await items_col.delete_many({})
+    await suppliers_col.delete_many({})
+    await ensure_indexes()
+    catalog = make_catalog(size)
+    for start in range(0, size, 10_000):
+        await items_col.insert_many(catalog[start:start + 10_000])
+    await suppliers_col.insert_many(make_suppliers())
+    await crud.sync_id_counters()
+    await crud.rebuild_item_analytics()
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for method, path, body in ENDPOINTS:
+            latencies, statuses = [], set()
+
+            async def worker(count):
+                for _ in range(count):
+                    started = time.perf_counter()
+                    response = await client.request(method, path, json=body)
+                    latencies.append(time.perf_counter() - started)
+                    statuses.add(response.status_code)
+
+            per_worker = max(1, requests // concurrency)
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(per_worker) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+            latencies.sort()
+            results.append({
+                "group": "api",
+                "name": f"{method} {path.split('?')[0]}",
+                "size": size,
+                "requests": len(latencies),
+                "concurrency": concurrency,
+                "median_s": round(statistics.median(latencies), 6),
+                "p95_s": round(latencies[int(len(latencies) * 0.95) - 1], 6),
+                "rps": round(len(latencies) / elapsed, 1),
+                "status": sorted(statuses),
+            })
+            print(f"  {results[-1]['name']:<28} {size:>7} items  p50 {results[-1]['median_s'] * 1000:9.2f} ms"
+                  f"  rps {results[-1]['rps']:8.1f}  status {results[-1]['status']}")
+    return results
+
+
+def run(sizes: list, requests: int = 50, concurrency: int = 4) -> list:
+    # database.py is imported here, after run.py has pointed MONGO_URL / DB_NAME at the bench target
+    import database
+    from benchmarks.run import BENCH_DB_NAME
+    from main import app
+
+    # _load deletes every item and supplier; never let that reach a real database
+    if database.DB_NAME != BENCH_DB_NAME:
+        raise RuntimeError(f"API benchmark must run against {BENCH_DB_NAME}, not {database.DB_NAME}")
+
+    async def all_sizes():
+        results = []
+        try:
+            for size in sizes:
+                results += await _load(app, size, requests, concurrency)
+        finally:
+            # Same event loop as the benchmark: Motor can't be reused once asyncio.run returns
+            await database.client.drop_database(BENCH_DB_NAME)
+        return results
+
+    return asyncio.run(all_sizes())
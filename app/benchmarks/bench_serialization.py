@@ -0,0 +1,34 @@
+import json
+import statistics
+import timeit
+import orjson
+from fastapi.encoders import jsonable_encoder
+from services.reorder_engine import build_reorder_alerts_batch
+from benchmarks.catalog import make_catalog
+
+# What FastAPI does for a plain dict/list return vs what ORJSONResponse does
+CASES = {
+    "jsonable_encoder+json.dumps": lambda rows: json.dumps(
+        jsonable_encoder(rows), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode(),
+    "orjson.dumps": lambda rows: orjson.dumps(rows),
+}
+
+
+def run(sizes: list, repeat: int = 5) -> list:
+    results = []
+    for size in sizes:
+        rows = build_reorder_alerts_batch(make_catalog(size))
+        for name, case in CASES.items():
+            rounds = max(1, repeat if size <= 10_000 else repeat // 2)
+            timings = timeit.repeat(lambda: case(rows), number=1, repeat=rounds)
+            results.append({
+                "group": "serialize",
+                "name": name,
+                "size": size,
+                "repeat": rounds,
+                "min_s": round(min(timings), 6),
+                "median_s": round(statistics.median(timings), 6),
+                "rows_per_s": round(size / min(timings)),
+            })
+            print(f"  {name:<28} {size:>7} alerts median {results[-1]['median_s'] * 1000:9.2f} ms")
+    return results
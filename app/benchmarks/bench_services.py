@@ -0,0 +1,41 @@
+import statistics
+import timeit
+from services.reorder import build_reorder_alerts, simulate_reorder
+from services.reorder_engine import build_reorder_alerts_batch, simulate_reorder_grid
+from services.variance import build_variance_report
+from services.analytics import build_item_analytics
+from benchmarks.catalog import make_catalog
+
+GRID = ([0, 10, 20, 50], [0, 1, 2, 5], [0, 5, 10])
+
+CASES = {
+    "build_reorder_alerts": lambda items: build_reorder_alerts(items),
+    "build_reorder_alerts_batch": lambda items: build_reorder_alerts_batch(items),
+    "build_variance_report": lambda items: build_variance_report(items),
+    "simulate_reorder": lambda items: [simulate_reorder(item, 10, 2, 5) for item in items],
+    "simulate_reorder_grid": lambda items: simulate_reorder_grid(items, *GRID),
+    "build_item_analytics": lambda items: build_item_analytics(items),
+}
+
+
+def run(sizes: list, repeat: int = 5, only: list = None) -> list:
+    results = []
+    for size in sizes:
+        items = make_catalog(size)
+        for name, case in CASES.items():
+            if only and name not in only:
+                continue
+            # Big catalogs get fewer repeats so a run stays in the minutes range
+            rounds = max(1, repeat if size <= 10_000 else repeat // 2)
+            timings = timeit.repeat(lambda: case(items), number=1, repeat=rounds)
+            results.append({
+                "group": "services",
+                "name": name,
+                "size": size,
+                "repeat": rounds,
+                "min_s": round(min(timings), 6),
+                "median_s": round(statistics.median(timings), 6),
+                "rows_per_s": round(size / min(timings)),
+            })
+            print(f"  {name:<28} {size:>7} items  median {results[-1]['median_s'] * 1000:9.2f} ms")
+    return results
@@ -0,0 +1,29 @@
+import random
+from seed import SEED_ITEMS, SEED_SUPPLIERS
+
+# Numeric fields that get jittered around the seed values
+JITTER_FIELDS = (
+    "planned_qty", "planned_rate", "actual_qty", "actual_rate", "current_stock",
+    "minimum_stock", "daily_consumption", "safety_stock", "production_value", "worker_cost",
+)
+
+
+def make_catalog(size: int, seed: int = 0) -> list:
+    """Synthetic items shaped like seed.SEED_ITEMS, deterministic for a given seed."""
+    rng = random.Random(seed)
+    items = []
+    for i in range(size):
+        template = SEED_ITEMS[i % len(SEED_ITEMS)]
+        item = dict(template)
+        for field in JITTER_FIELDS:
+            item[field] = round(template[field] * rng.uniform(0.5, 1.5), 2)
+        item["lead_time_days"] = max(1, template["lead_time_days"] + rng.randint(-1, 3))
+        item["delay_history"] = rng.randint(0, 6)
+        item["id"] = i + 1
+        item["name"] = f"{template['name']} {i + 1}"
+        items.append(item)
+    return items
+
+
+def make_suppliers() -> list:
+    return [dict(s) for s in SEED_SUPPLIERS]
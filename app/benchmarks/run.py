@@ -0,0 +1,101 @@
+"""Benchmark the service functions and, optionally, the API in-process.
+
+Run from the app directory:
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output bench.json
+    python -m benchmarks.run --api --mongomock --sizes 1000 --compare bench.json
+
+--api loads a synthetic catalog into BENCH_DB_NAME (inventory_bench by default) on
+MONGO_URL (a local mongod by default) and drops it afterwards; it refuses to start when
+DB_NAME names any other database. --mongomock uses mongomock-motor instead.
+Some aggregation stages are not emulated by mongomock, so endpoints that use them
+report a 500 there. --compare exits 1 when any median is more than --threshold times
+slower than in the given earlier result file.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime
+
+# The API benchmark wipes and drops this database, so it never shares DB_NAME with the app
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "inventory_bench")
+
+
+def _compare(results: list, baseline_path: str, threshold: float) -> bool:
+    with open(baseline_path) as f:
+        baseline = {(r["group"], r["name"], r["size"]): r for r in json.load(f)["results"]}
+    regressed = False
+    print(f"\nCompared with {baseline_path}:")
+    for r in results:
+        old = baseline.get((r["group"], r["name"], r["size"]))
+        if not old or not old["median_s"]:
+            continue
+        ratio = r["median_s"] / old["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        regressed = regressed or bool(flag)
+        print(f"  {r['group']:<8} {r['name']:<28} {r['size']:>7}  x{ratio:5.2f} {flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Service benchmark names to run")
+    parser.add_argument("--api", action="store_true", help="Also load-test the FastAPI app in-process")
+    parser.add_argument("--api-sizes", type=int, nargs="+", help="Catalog sizes for --api (default: --sizes)")
+    parser.add_argument("--mongomock", action="store_true", help="Use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args(argv)
+
+    # Must happen before anything imports database.py (seed.py, and so the catalog, does)
+    if args.api:
+        if os.environ.get("DB_NAME", BENCH_DB_NAME) != BENCH_DB_NAME:
+            parser.error(f"--api clears and drops its database; unset DB_NAME or set it to {BENCH_DB_NAME}")
+        os.environ["DB_NAME"] = BENCH_DB_NAME
+        if args.mongomock:
+            import motor.motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+            motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+    from benchmarks import bench_services
+    print("Service functions:")
+    results = bench_services.run(args.sizes, args.repeat, args.only)
+
+    from benchmarks import bench_serialization
+    print("Response serialization (reorder alerts):")
+    results += bench_serialization.run(args.sizes, args.repeat)
+
+    if args.api:
+        from benchmarks import bench_api
+        print("API (in-process):")
+        results += bench_api.run(args.api_sizes or args.sizes, args.requests, args.concurrency)
+
+    import numpy
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "machine": platform.machine(),
+            "sizes": args.sizes,
+            "mongo": "mongomock" if args.mongomock else os.getenv("MONGO_URL", "mongodb://localhost:27017"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare and _compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,167 @@
-from database import items_col, orders_col, suppliers_col, purchase_orders_col
-from datetime import datetime
+import asyncio
+import time
+from database import (
+    client, TRANSACTIONS_UNSUPPORTED_CODES, items_col, orders_col, order_lines_col, suppliers_col, purchase_orders_col, counters_col,
+    item_analytics_col, portfolio_totals_col, actual_consumptions_col, supplier_performance_col, item_locations_col,
+    production_plans_col, bom_lines_col, mrp_plans_col, mrp_runs_col, variance_snapshots_col, variance_period_totals_col,
+)
+from datetime import date, datetime, timedelta, timezone
+from pymongo import DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from services.reorder import risk_score_expr
+from services.analytics import TOTAL_FIELDS, build_item_analytics, totals_delta
+from services.replenishment import plan_consolidated_orders
+from services.locations import build_location_plan
+from services.bom import check_acyclic, explode_requirements
+from services.variance import period_bounds, periods_back, variance_amount_exprs, waste_pct_expr
+from services.mrp import DEFAULT_ORDER_CYCLE_DAYS, build_mrp_inputs, item_buckets, net_requirements, planned_order_docs
+from cache import items_cache, suppliers_cache
+from live import alert_feed
 
 
 # ── Helper: get next auto-increment id ──
-async def get_next_id(collection):
-    doc = await collection.find_one(sort=[("id", -1)])
-    return (doc["id"] + 1) if doc else 1
+# One counter document per collection: {"_id": <collection name>, "seq": <last id handed out>}
+async def get_next_id(collection, count: int = 1):
+    """Atomically reserve `count` consecutive ids and return the first one."""
+    doc = await counters_col.find_one_and_update(
+        {"_id": collection.name},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["seq"] - count + 1
 
 
+async def sync_id_counters():
+    # Migration: never let a counter fall behind ids already in the collection
+    for collection in (items_col, orders_col, suppliers_col, purchase_orders_col, production_plans_col):
+        doc = await collection.find_one({}, {"id": 1}, sort=[("id", -1)])
+        if doc:
+            await counters_col.update_one(
+                {"_id": collection.name},
+                {"$max": {"seq": doc["id"]}},
+                upsert=True,
+            )
+
+
+# ── Helper: unordered bulk write, returning {op index: error message} ──
+BULK_CHUNK_SIZE = 1000
+
+
+async def _bulk_write(collection, ops: list) -> dict:
+    try:
+        await collection.bulk_write(ops, ordered=False)
+    except BulkWriteError as e:
+        return {err["index"]: err["errmsg"] for err in e.details["writeErrors"]}
+    return {}
+
+
+# ── Helper: run callback(session) in a transaction, or without one on a standalone server ──
+# None until the first attempt tells us whether the server supports transactions
+_transactions_supported = None
+
+
+async def run_in_transaction(callback):
+    global _transactions_supported
+    if _transactions_supported is not False:
+        async with await client.start_session() as session:
+            try:
+                result = await session.with_transaction(callback)
+            except OperationFailure as e:
+                if e.code not in TRANSACTIONS_UNSUPPORTED_CODES:
+                    raise
+                _transactions_supported = False
+            else:
+                _transactions_supported = True
+                return result
+    return await callback(None)
+
+
+# ── Helper: keyset page over the numeric id ──
+def _projection(fields: list = None):
+    if not fields:
+        return {"_id": 0}
+    projection = {f: 1 for f in fields}
+    projection.update({"_id": 0, "id": 1})
+    return projection
+
+
+async def find_page(collection, limit: int = None, after: int = None, fields: list = None, descending: bool = False):
+    query = {}
+    if after is not None:
+        query["id"] = {"$lt": after} if descending else {"$gt": after}
+    cursor = collection.find(query, _projection(fields)).sort("id", -1 if descending else 1)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(length=None)
+
  
 #  INVENTORY ITEMS
  
 
-async def get_all_items():
-    cursor = items_col.find({}, {"_id": 0}).sort("id", 1)
-    return await cursor.to_list(length=100)
+async def get_all_items(limit: int = None, after: int = None, fields: list = None):
+    key = ("page", limit, after, tuple(fields) if fields else None)
+    return await items_cache.get_or_load(key, lambda: find_page(items_col, limit, after, fields))
+
+
+async def iter_item_batches(batch_size: int = 500):
+    # Streams the catalog in id order without holding it all in memory
+    cursor = items_col.find({}, {"_id": 0}).sort("id", 1).batch_size(batch_size)
+    batch = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def get_item_totals():
+    # One $group over the items; only the totals come back over the wire
+    pipeline = [
+        {"$group": {
+            "_id": None,
+            "planned_cost": {"$sum": {"$multiply": ["$planned_qty", "$planned_rate"]}},
+            "actual_cost": {"$sum": {"$multiply": ["$actual_qty", "$actual_rate"]}},
+            "items_at_risk": {"$sum": {"$cond": [
+                {"$gt": [
+                    {"$subtract": [
+                        {"$add": [{"$multiply": ["$daily_consumption", "$lead_time_days"]}, "$safety_stock"]},
+                        "$current_stock",
+                    ]},
+                    0,
+                ]},
+                1,
+                0,
+            ]}},
+            "risk_score_sum": {"$sum": risk_score_expr()},
+            "item_count": {"$sum": 1},
+        }},
+        {"$project": {"_id": 0}},
+    ]
+    rows = await items_col.aggregate(pipeline).to_list(length=1)
+    if not rows:
+        return {"planned_cost": 0, "actual_cost": 0, "items_at_risk": 0, "risk_score_sum": 0, "item_count": 0}
+    return rows[0]
 
 
 async def get_item_by_id(item_id: int):
-    return await items_col.find_one({"id": item_id}, {"_id": 0})
+    return await items_cache.get_or_load(
+        ("id", item_id), lambda: items_col.find_one({"id": item_id}, {"_id": 0})
+    )
+
+
+async def get_items_by_ids(item_ids: list):
+    cursor = items_col.find({"id": {"$in": item_ids}}, {"_id": 0}).sort("id", 1)
+    return await cursor.to_list(length=None)
 
 
 async def create_item(data: dict):
     data["id"] = await get_next_id(items_col)
     await items_col.insert_one(data)
+    items_cache.invalidate()
+    await refresh_item_analytics([data["id"]])
     return await get_item_by_id(data["id"])
 
 
@@ -32,43 +170,814 @@ async def update_item(item_id: int, data: dict):
     if not update_data:
         return await get_item_by_id(item_id)
     await items_col.update_one({"id": item_id}, {"$set": update_data})
+    items_cache.invalidate()
+    await refresh_item_analytics([item_id])
     return await get_item_by_id(item_id)
 
 
+async def bulk_create_items(rows: list, start_row: int = 0) -> list:
+    """Insert items chunk by chunk; ids for a chunk are reserved in one counter call."""
+    results = []
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        first_id = await get_next_id(items_col, len(chunk))
+        for offset, data in enumerate(chunk):
+            data["id"] = first_id + offset
+        errors = await _bulk_write(items_col, [InsertOne(data) for data in chunk])
+        items_cache.invalidate()
+        await refresh_item_analytics([data["id"] for data in chunk])
+        for offset, data in enumerate(chunk):
+            row = {"row": start_row + start + offset, "id": data["id"], "status": "created"}
+            if offset in errors:
+                row.update(status="error", error=errors[offset])
+            results.append(row)
+    return results
+
+
+async def bulk_update_items(rows: list, start_row: int = 0) -> list:
+    """Apply partial updates ({"id": ..., <fields>}) chunk by chunk."""
+    results = []
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        ids = [data["id"] for data in chunk]
+        found = {doc["id"] async for doc in items_col.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})}
+
+        ops, op_rows = [], []
+        for offset, data in enumerate(chunk):
+            row = {"row": start_row + start + offset, "id": data["id"]}
+            update_data = {k: v for k, v in data.items() if v is not None and k != "id"}
+            if data["id"] not in found:
+                row["status"] = "not_found"
+            elif not update_data:
+                row["status"] = "unchanged"
+            else:
+                row["status"] = "updated"
+                ops.append(UpdateOne({"id": data["id"]}, {"$set": update_data}))
+                op_rows.append(row)
+            results.append(row)
+
+        errors = await _bulk_write(items_col, ops) if ops else {}
+        if ops:
+            items_cache.invalidate()
+            await refresh_item_analytics([row["id"] for row in op_rows])
+        for index, message in errors.items():
+            op_rows[index].update(status="error", error=message)
+    return results
+
+
 async def delete_item(item_id: int):
     result = await items_col.delete_one({"id": item_id})
+    await item_locations_col.delete_many({"item_id": item_id})
+    items_cache.invalidate()
+    await refresh_item_analytics([item_id])
     return result.deleted_count > 0
 
 
  
+#  ITEM ANALYTICS SNAPSHOT
+#  One precomputed document per item plus running portfolio totals,
+#  kept current by the item write paths above.
+ 
+
+async def rebuild_item_analytics(batch_size: int = 1000):
+    """Full recompute; run at startup to pick up writes made outside crud (seed, manual edits).
+
+    Snapshots are upserted in place rather than wiped and reinserted, so readers and
+    concurrent refresh_item_analytics calls never see the collection empty. Totals are
+    then summed from the snapshots themselves instead of carried alongside.
+    """
+    seen = set()
+    async for items in iter_item_batches(batch_size):
+        docs = build_item_analytics(items)
+        await item_analytics_col.bulk_write(
+            [ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs], ordered=False
+        )
+        seen.update(doc["id"] for doc in docs)
+
+    # Snapshots of items that are gone; re-check so an item created meanwhile keeps its own
+    stale = [doc["id"] async for doc in item_analytics_col.find({}, {"_id": 0, "id": 1}) if doc["id"] not in seen]
+    if stale:
+        live_ids = await items_col.distinct("id", {"id": {"$in": stale}})
+        await item_analytics_col.delete_many({"id": {"$in": sorted(set(stale) - set(live_ids))}})
+
+    pipeline = [{"$group": {"_id": None, **{field: {"$sum": f"$totals.{field}"} for field in TOTAL_FIELDS}}}]
+    grouped = await item_analytics_col.aggregate(pipeline).to_list(length=1)
+    totals = {field: grouped[0][field] if grouped else 0 for field in TOTAL_FIELDS}
+    await portfolio_totals_col.replace_one({"_id": "portfolio"}, totals, upsert=True)
+
+
+async def refresh_item_analytics(item_ids: list):
+    """Recompute the snapshots of the given items and apply the difference to the totals.
+
+    One read of the items, one of their old snapshots and one unordered bulk write,
+    however many items changed.
+    """
+    item_ids = list(dict.fromkeys(item_ids))
+    if not item_ids:
+        return
+    items = await items_col.find({"id": {"$in": item_ids}}, {"_id": 0}).to_list(length=None)
+    new_docs = {doc["id"]: doc for doc in build_item_analytics(items)}
+    old_docs = await item_analytics_col.find(
+        {"id": {"$in": item_ids}}, {"_id": 0, "id": 1, "totals": 1}
+    ).to_list(length=None)
+    deleted_ids = [item_id for item_id in item_ids if item_id not in new_docs]
+    ops = [ReplaceOne({"id": item_id}, doc, upsert=True) for item_id, doc in new_docs.items()]
+    ops += [DeleteOne({"id": item_id}) for item_id in deleted_ids]
+    for start in range(0, len(ops), BULK_CHUNK_SIZE):
+        await item_analytics_col.bulk_write(ops[start:start + BULK_CHUNK_SIZE], ordered=False)
+    delta = totals_delta(old_docs, list(new_docs.values()))
+    await portfolio_totals_col.update_one({"_id": "portfolio"}, {"$inc": delta}, upsert=True)
+    alert_feed.publish_items(items, deleted_ids)
+
+
+async def get_portfolio_totals():
+    return await portfolio_totals_col.find_one({"_id": "portfolio"}, {"_id": 0})
+
+
+async def get_top_alerts(k: int, min_risk: int = 0, by: str = "risk"):
+    # Index-backed: Mongo walks the first k entries of risk_score / coverage_days
+    if by == "stockout":
+        sort = [("alert.coverage_days", 1), ("id", 1)]
+    else:
+        sort = [("alert.risk_score", -1), ("id", 1)]
+    query = {"alert.risk_score": {"$gte": min_risk}} if min_risk else {}
+    cursor = item_analytics_col.find(query, {"_id": 0, "alert": 1}).sort(sort).limit(k)
+    return [doc["alert"] async for doc in cursor]
+
+
+async def get_analytics_rows(section: str):
+    # section is one of "alert", "variance", "production_loss"
+    cursor = item_analytics_col.find({}, {"_id": 0, section: 1}).sort("id", 1)
+    return [doc[section] async for doc in cursor]
+
+
+ 
+#  CONSUMPTION HISTORY (time-series collection)
+ 
+
+CONSUMPTION_CHUNK_SIZE = 5000
+
+
+async def insert_consumption_events(events: list) -> int:
+    now = datetime.now(timezone.utc)
+    for event in events:
+        if event.get("ts") is None:
+            event["ts"] = now
+    for start in range(0, len(events), CONSUMPTION_CHUNK_SIZE):
+        await actual_consumptions_col.insert_many(events[start:start + CONSUMPTION_CHUNK_SIZE], ordered=False)
+    return len(events)
+
+
+def _daily_consumption_pipeline(start: datetime, end: datetime) -> list:
+    return [
+        {"$match": {"ts": {"$gte": start, "$lt": end}}},
+        {"$group": {
+            "_id": {"item_id": "$item_id", "day": {"$dateTrunc": {"date": "$ts", "unit": "day"}}},
+            "qty": {"$sum": "$qty"},
+        }},
+        {"$project": {"_id": 0, "item_id": "$_id.item_id", "day": "$_id.day", "qty": 1}},
+    ]
+
+
+async def get_daily_consumption(item_id: int, days: int = 30):
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    pipeline = [{"$match": {"item_id": item_id}}]
+    pipeline += _daily_consumption_pipeline(end - timedelta(days=days), end)
+    pipeline += [{"$sort": {"day": 1}}, {"$project": {"item_id": 0}}]
+    return await actual_consumptions_col.aggregate(pipeline).to_list(length=None)
+
+
+async def recompute_daily_consumption(window_days: int = 28, method: str = "ewma", alpha: float = 0.3):
+    """Rewrite inventory_items.daily_consumption from recorded usage in one pipeline.
+
+    ewma:    exponential moving average of daily totals, days without events count as 0
+    rolling: total usage over the window divided by window_days
+    Items with no events in the window keep their current value.
+    """
+    end = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = end - timedelta(days=window_days)
+    pipeline = _daily_consumption_pipeline(start, end)
+    if method == "ewma":
+        pipeline += [
+            {"$densify": {
+                "field": "day",
+                "partitionByFields": ["item_id"],
+                "range": {"step": 1, "unit": "day", "bounds": [start, end]},
+            }},
+            {"$fill": {"output": {"qty": {"value": 0}}}},
+            {"$setWindowFields": {
+                "partitionBy": "$item_id",
+                "sortBy": {"day": 1},
+                "output": {"estimate": {"$expMovingAvg": {"input": "$qty", "alpha": alpha}}},
+            }},
+            {"$group": {"_id": "$item_id", "daily": {"$bottom": {"sortBy": {"day": 1}, "output": "$estimate"}}}},
+        ]
+    else:
+        pipeline += [
+            {"$group": {"_id": "$item_id", "daily": {"$sum": "$qty"}}},
+            {"$set": {"daily": {"$divide": ["$daily", window_days]}}},
+        ]
+    pipeline += [
+        {"$project": {"_id": 0, "id": "$_id", "daily_consumption": {"$round": ["$daily", 2]}}},
+        {"$merge": {
+            "into": items_col.name,
+            "on": "id",
+            "whenMatched": [{"$set": {"daily_consumption": "$$new.daily_consumption"}}],
+            "whenNotMatched": "discard",
+        }},
+    ]
+    await actual_consumptions_col.aggregate(pipeline).to_list(length=None)
+
+    # $merge wrote behind crud's back: drop cached items and refresh their snapshots
+    item_ids = await actual_consumptions_col.distinct("item_id", {"ts": {"$gte": start, "$lt": end}})
+    items_cache.invalidate()
+    await refresh_item_analytics(item_ids)
+    return {"window_days": window_days, "method": method, "items_updated": len(item_ids)}
+
+
+ 
+#  STOCK PER LOCATION
+ 
+
+async def get_item_locations(item_id: int):
+    cursor = item_locations_col.find({"item_id": item_id}, {"_id": 0}).sort("location", 1)
+    return await cursor.to_list(length=None)
+
+
+async def upsert_location_stock(rows: list, start_row: int = 0) -> list:
+    """Set stock for (item_id, location) pairs chunk by chunk, adding new locations as needed."""
+    results = []
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        ids = list({data["item_id"] for data in chunk})
+        found = {doc["id"] async for doc in items_col.find({"id": {"$in": ids}}, {"_id": 0, "id": 1})}
+
+        ops, op_rows = [], []
+        for offset, data in enumerate(chunk):
+            key = {"item_id": data["item_id"], "location": data["location"]}
+            row = {"row": start_row + start + offset, **key}
+            if data["item_id"] not in found:
+                row["status"] = "not_found"
+            else:
+                row["status"] = "saved"
+                fields = {k: v for k, v in data.items() if v is not None}
+                ops.append(UpdateOne(key, {"$set": fields}, upsert=True))
+                op_rows.append(row)
+            results.append(row)
+
+        errors = await _bulk_write(item_locations_col, ops) if ops else {}
+        for index, message in errors.items():
+            op_rows[index].update(status="error", error=message)
+    return results
+
+
+def _location_rows_pipeline(item_ids: list = None) -> list:
+    # One joined row per (item, location); the item supplies its name, supplier and default lead time
+    pipeline = [{"$match": {"item_id": {"$in": item_ids}}}] if item_ids else []
+    pipeline += [
+        {"$lookup": {
+            "from": items_col.name,
+            "localField": "item_id",
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "name": 1, "supplier_name": 1, "lead_time_days": 1}}],
+            "as": "item",
+        }},
+        {"$unwind": "$item"},
+        {"$project": {
+            "_id": 0,
+            "item_id": 1,
+            "location": 1,
+            "current_stock": 1,
+            "daily_consumption": {"$ifNull": ["$daily_consumption", 0]},
+            "safety_stock": {"$ifNull": ["$safety_stock", 0]},
+            "lead_time_days": {"$ifNull": ["$lead_time_days", "$item.lead_time_days"]},
+            "name": "$item.name",
+            "supplier_name": "$item.supplier_name",
+        }},
+    ]
+    return pipeline
+
+
+async def get_location_plan(item_ids: list = None):
+    """Per-location reorder needs, proposed transfers and what is left to buy, per item."""
+    rows = await item_locations_col.aggregate(_location_rows_pipeline(item_ids)).to_list(length=None)
+    return build_location_plan(rows)
+
+
+ 
+#  PRODUCTION PLANS AND BILLS OF MATERIALS
+ 
+
+async def get_all_production_plans(limit: int = None, after: int = None, fields: list = None):
+    return await find_page(production_plans_col, limit, after, fields)
+
+
+async def create_production_plans(rows: list) -> list:
+    first_id = await get_next_id(production_plans_col, len(rows))
+    for offset, data in enumerate(rows):
+        data["id"] = first_id + offset
+        data["due_date"] = data["due_date"].isoformat()
+        data["status"] = "Planned"
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        await production_plans_col.insert_many(rows[start:start + BULK_CHUNK_SIZE], ordered=False)
+    for data in rows:
+        data.pop("_id", None)
+    return rows
+
+
+async def complete_production_plan(plan_id: int):
+    """Mark a plan as produced; its demand drops out of the material requirements."""
+    return await production_plans_col.find_one_and_update(
+        {"id": plan_id},
+        {"$set": {"status": "Completed", "completed_at": datetime.now().isoformat()}},
+        {"_id": 0},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def delete_production_plan(plan_id: int):
+    result = await production_plans_col.delete_one({"id": plan_id})
+    return result.deleted_count > 0
+
+
+async def get_bom_lines(parent_id: int = None):
+    query = {} if parent_id is None else {"parent_id": parent_id}
+    cursor = bom_lines_col.find(query, {"_id": 0}).sort([("parent_id", 1), ("component_id", 1)])
+    return await cursor.to_list(length=None)
+
+
+async def upsert_bom_lines(rows: list) -> dict:
+    """Add or replace BOM lines; raises BomCycleError (nothing written) if they would create a cycle."""
+    merged = {(line["parent_id"], line["component_id"]): line for line in await get_bom_lines()}
+    merged.update({(line["parent_id"], line["component_id"]): line for line in rows})
+    check_acyclic(list(merged.values()))
+
+    ops = [
+        UpdateOne({"parent_id": line["parent_id"], "component_id": line["component_id"]}, {"$set": line}, upsert=True)
+        for line in rows
+    ]
+    errors = {}
+    for start in range(0, len(ops), BULK_CHUNK_SIZE):
+        chunk_errors = await _bulk_write(bom_lines_col, ops[start:start + BULK_CHUNK_SIZE])
+        errors.update({start + index: message for index, message in chunk_errors.items()})
+    return {"saved": len(ops) - len(errors), "errors": [{"row": i, "error": m} for i, m in errors.items()]}
+
+
+async def delete_bom_line(parent_id: int, component_id: int):
+    result = await bom_lines_col.delete_one({"parent_id": parent_id, "component_id": component_id})
+    return result.deleted_count > 0
+
+
+async def get_material_requirements(horizon_days: int = 90):
+    """Explode every open production plan due within the horizon down to raw materials.
+
+    Plans still open past their due date are late, not done, so they stay in as
+    demand due today until they are completed.
+    """
+    start = date.today()
+    end = (start + timedelta(days=horizon_days)).isoformat()
+    lines = await get_bom_lines()
+    plans = await production_plans_col.find(
+        {"due_date": {"$lt": end}, "status": {"$ne": "Completed"}},
+        {"_id": 0, "item_id": 1, "qty": 1, "due_date": 1},
+    ).to_list(length=None)
+    return explode_requirements(lines, plans, horizon_days, start)
+
+
+async def apply_planned_consumption(horizon_days: int = 90):
+    """Set daily_consumption of every planned raw material to its average daily requirement."""
+    requirements = (await get_material_requirements(horizon_days))["requirements"]
+    ops = [
+        UpdateOne({"id": row["item_id"]}, {"$set": {"daily_consumption": row["avg_daily_qty"]}})
+        for row in requirements
+    ]
+    for start in range(0, len(ops), BULK_CHUNK_SIZE):
+        await _bulk_write(items_col, ops[start:start + BULK_CHUNK_SIZE])
+    items_cache.invalidate()
+    await refresh_item_analytics([row["item_id"] for row in requirements])
+    return {"horizon_days": horizon_days, "items_updated": len(requirements)}
+
+
+ 
+#  MATERIAL REQUIREMENTS PLANNING
+ 
+
+def _open_receipts_pipeline(item_name: str = None) -> list:
+    # Open POs are the ones not yet delivered or cancelled; a consolidated PO gives one receipt per line
+    pipeline = [{"$match": {"delivered_date": {"$in": [None, ""]}, "status": {"$ne": "Cancelled"}}}]
+    if item_name is not None:
+        pipeline.append({"$match": {"$or": [{"item_name": item_name}, {"lines.item_name": item_name}]}})
+    pipeline += [
+        {"$project": {
+            "_id": 0,
+            # expected_delivery defaults to "" on POs raised through the API
+            "date": {"$cond": [
+                {"$in": [{"$ifNull": ["$expected_delivery", ""]}, [""]]},
+                "$required_by_date",
+                "$expected_delivery",
+            ]},
+            "lines": {"$ifNull": ["$lines", [{"item_name": "$item_name", "order_qty": "$order_qty"}]]},
+        }},
+        {"$unwind": "$lines"},
+    ]
+    if item_name is not None:
+        pipeline.append({"$match": {"lines.item_name": item_name}})
+    pipeline += [
+        {"$group": {"_id": {"item_name": "$lines.item_name", "date": "$date"}, "qty": {"$sum": "$lines.order_qty"}}},
+        {"$project": {"_id": 0, "item_name": "$_id.item_name", "date": "$_id.date", "qty": 1}},
+    ]
+    return pipeline
+
+
+async def run_mrp(horizon_days: int = 90, order_cycle_days: int = DEFAULT_ORDER_CYCLE_DAYS):
+    """Net the whole catalog over the horizon and replace the stored planned orders."""
+    started = time.perf_counter()
+    start = date.today()
+    items = await get_all_items()
+    requirements = (await get_material_requirements(horizon_days))["requirements"]
+    receipts = await purchase_orders_col.aggregate(_open_receipts_pipeline()).to_list(length=None)
+
+    gross, scheduled, on_hand = build_mrp_inputs(items, requirements, receipts, horizon_days, start)
+    netted = net_requirements(items, gross, scheduled, on_hand, order_cycle_days)
+    docs = planned_order_docs(items, netted, gross, scheduled, on_hand, start)
+
+    run_at = datetime.now(timezone.utc)
+    for doc in docs:
+        doc["run_at"] = run_at
+    ops = [ReplaceOne({"item_id": doc["item_id"]}, doc, upsert=True) for doc in docs]
+    for chunk_start in range(0, len(ops), BULK_CHUNK_SIZE):
+        await _bulk_write(mrp_plans_col, ops[chunk_start:chunk_start + BULK_CHUNK_SIZE])
+    # Items deleted since the last run
+    await mrp_plans_col.delete_many({"run_at": {"$ne": run_at}})
+
+    run = {
+        "run_at": run_at,
+        "start_date": start.isoformat(),
+        "horizon_days": horizon_days,
+        "order_cycle_days": order_cycle_days,
+        "items": len(docs),
+        "planned_orders": len(netted["order_rows"]),
+        "past_due_orders": int((netted["release_days"] < 0).sum()),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    await mrp_runs_col.insert_one(run)
+    run.pop("_id", None)
+    return run
+
+
+async def get_latest_mrp_run():
+    return await mrp_runs_col.find_one({}, {"_id": 0}, sort=[("run_at", -1)])
+
+
+async def get_planned_orders(release_within_days: int = 7, item_id: int = None):
+    """Planned order releases from the last MRP run due within the given number of days."""
+    cutoff = (date.today() + timedelta(days=release_within_days)).isoformat()
+    match = {"planned_orders.release_date": {"$lte": cutoff}}
+    if item_id is not None:
+        match["item_id"] = item_id
+    pipeline = [
+        {"$match": match},
+        {"$unwind": "$planned_orders"},
+        {"$match": {"planned_orders.release_date": {"$lte": cutoff}}},
+        {"$project": {
+            "_id": 0,
+            "item_id": 1,
+            "name": 1,
+            "supplier_name": 1,
+            "release_date": "$planned_orders.release_date",
+            "receipt_date": "$planned_orders.receipt_date",
+            "qty": "$planned_orders.qty",
+            "past_due": "$planned_orders.past_due",
+        }},
+        {"$sort": {"release_date": 1, "item_id": 1}},
+    ]
+    return await mrp_plans_col.aggregate(pipeline).to_list(length=None)
+
+
+async def get_item_mrp(item_id: int, horizon_days: int = 90, order_cycle_days: int = DEFAULT_ORDER_CYCLE_DAYS):
+    """Live day-by-day MRP record of one item."""
+    item = await get_item_by_id(item_id)
+    if not item:
+        return None
+    start = date.today()
+    requirements = [
+        row for row in (await get_material_requirements(horizon_days))["requirements"] if row["item_id"] == item_id
+    ]
+    receipts = await purchase_orders_col.aggregate(_open_receipts_pipeline(item["name"])).to_list(length=None)
+
+    gross, scheduled, on_hand = build_mrp_inputs([item], requirements, receipts, horizon_days, start)
+    netted = net_requirements([item], gross, scheduled, on_hand, order_cycle_days)
+    doc = planned_order_docs([item], netted, gross, scheduled, on_hand, start)[0]
+    doc["buckets"] = item_buckets(netted, gross, scheduled, 0, start)
+    return doc
+
+
+ 
+#  VARIANCE HISTORY
+#  Weekly/monthly snapshots of each item's planned and actual qty and rate.
+#  Only the open period is ever written, so closed periods are immutable.
+ 
+
+async def capture_variance_snapshots(period_type: str = "month"):
+    """Snapshot every item into the open period and refresh that period's catalog roll-up."""
+    now = datetime.now(timezone.utc)
+    period, start = period_bounds(period_type, now)
+    key = {"period_type": period_type, "period_start": start}
+    await items_col.aggregate([
+        {"$project": {
+            "_id": 0,
+            "item_id": "$id",
+            "name": 1,
+            "unit": 1,
+            "planned_qty": 1,
+            "planned_rate": 1,
+            "actual_qty": 1,
+            "actual_rate": 1,
+            "period_type": {"$literal": period_type},
+            "period": {"$literal": period},
+            "period_start": {"$literal": start},
+            "captured_at": {"$literal": now},
+        }},
+        {"$merge": {
+            "into": variance_snapshots_col.name,
+            "on": ["item_id", "period_type", "period_start"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]).to_list(length=None)
+    # Items deleted since the last capture drop out of the open period
+    await variance_snapshots_col.delete_many({**key, "captured_at": {"$ne": now}})
+
+    totals = await variance_snapshots_col.aggregate([
+        {"$match": key},
+        {"$group": {
+            "_id": None,
+            "items": {"$sum": 1},
+            **{field: {"$sum": expr} for field, expr in variance_amount_exprs().items()},
+        }},
+        {"$project": {"_id": 0}},
+    ]).to_list(length=None)
+    rollup = {**key, "period": period, "items": 0, **(totals[0] if totals else {}), "captured_at": now}
+    await variance_period_totals_col.replace_one(key, rollup, upsert=True)
+    return {"period_type": period_type, "period": period, "items": rollup["items"]}
+
+
+def _variance_trend_stages(window: int) -> list:
+    variance = {"$subtract": ["$actual_amount", "$planned_amount"]}
+    rolling = {"documents": [1 - window, 0]}
+    return [
+        {"$setWindowFields": {
+            "sortBy": {"period_start": 1},
+            "output": {
+                "previous_variance": {"$shift": {"output": variance, "by": -1}},
+                "rolling_planned": {"$sum": "$planned_amount", "window": rolling},
+                "rolling_standard_actual": {"$sum": "$standard_actual_amount", "window": rolling},
+            },
+        }},
+        {"$project": {
+            "_id": 0,
+            "period": 1,
+            "period_start": 1,
+            "items": {"$ifNull": ["$items", 1]},
+            "planned_amount": {"$round": ["$planned_amount", 2]},
+            "actual_amount": {"$round": ["$actual_amount", 2]},
+            "variance": {"$round": [variance, 2]},
+            "price_variance": {"$round": ["$price_variance", 2]},
+            "qty_variance": {"$round": ["$qty_variance", 2]},
+            "variance_change": {"$cond": [
+                {"$eq": ["$previous_variance", None]},
+                None,
+                {"$round": [{"$subtract": [variance, "$previous_variance"]}, 2]},
+            ]},
+            "waste_pct": waste_pct_expr("$planned_amount", "$standard_actual_amount"),
+            "rolling_waste_pct": waste_pct_expr("$rolling_planned", "$rolling_standard_actual"),
+        }},
+        {"$sort": {"period_start": 1}},
+    ]
+
+
+async def get_variance_trend(period_type: str = "month", periods: int = 12, item_id: int = None, window: int = 3):
+    """Variance per period, split into price and quantity effects, with a rolling waste_pct.
+
+    The catalog trend reads the per-period roll-ups; an item's trend reads its
+    snapshots through the (item, period) index.
+    """
+    _, current_start = period_bounds(period_type, datetime.now(timezone.utc))
+    match = {"period_type": period_type, "period_start": {"$gte": periods_back(period_type, current_start, periods - 1)}}
+    if item_id is None:
+        collection, pipeline = variance_period_totals_col, [{"$match": match}]
+    else:
+        collection = variance_snapshots_col
+        pipeline = [{"$match": {"item_id": item_id, **match}}, {"$set": variance_amount_exprs()}]
+    pipeline += _variance_trend_stages(window)
+    return await collection.aggregate(pipeline).to_list(length=None)
+
+
+ 
 #  ORDERS
  
 
-async def get_all_orders():
-    cursor = orders_col.find({}, {"_id": 0}).sort("id", 1)
-    return await cursor.to_list(length=100)
+async def get_all_orders(limit: int = None, after: int = None, fields: list = None):
+    return await find_page(orders_col, limit, after, fields)
+
+
+async def count_orders():
+    return await orders_col.count_documents({})
 
 
 async def get_order_by_id(order_id: int):
     return await orders_col.find_one({"id": order_id}, {"_id": 0})
 
 
+def _order_status(planned_total: float, actual_total: float) -> dict:
+    variance = actual_total - planned_total
+    return {
+        "planned_total": planned_total,
+        "actual_total": actual_total,
+        "variance_total": variance,
+        "status": "Over Budget" if variance > 0 else "Under Budget",
+    }
+
+
+async def _price_order_lines(order_id: int, lines: list) -> list:
+    """Number the lines from 1 and freeze missing rates from their items, in one query for all lines.
+
+    add_order_lines renumbers them from the order's line counter.
+    """
+    ids = list({line["item_id"] for line in lines})
+    items = {doc["id"]: doc async for doc in items_col.find(
+        {"id": {"$in": ids}}, {"_id": 0, "id": 1, "planned_rate": 1, "actual_rate": 1}
+    )}
+    unknown = sorted(set(ids) - set(items))
+    if unknown:
+        raise ValueError(f"Unknown item ids: {unknown}")
+    priced = []
+    for line_no, line in enumerate(lines, 1):
+        item = items[line["item_id"]]
+        priced.append({
+            "order_id": order_id,
+            "line_no": line_no,
+            "item_id": line["item_id"],
+            "planned_qty": line["planned_qty"],
+            "planned_rate": item["planned_rate"] if line.get("planned_rate") is None else line["planned_rate"],
+            "actual_qty": line["actual_qty"],
+            "actual_rate": item["actual_rate"] if line.get("actual_rate") is None else line["actual_rate"],
+        })
+    return priced
+
+
+async def _insert_order_lines(lines: list, session=None):
+    for start in range(0, len(lines), BULK_CHUNK_SIZE):
+        await order_lines_col.insert_many(lines[start:start + BULK_CHUNK_SIZE], ordered=False, session=session)
+
+
 async def create_order(data: dict):
+    """Insert an order; with lines, its totals are the sum of the lines. Raises ValueError for unknown items."""
+    lines = data.pop("lines", None) or []
     data["id"] = await get_next_id(orders_col)
-    variance = data["actual_total"] - data["planned_total"]
-    data["variance_total"] = variance
-    data["status"] = "Over Budget" if variance > 0 else "Under Budget"
-    await orders_col.insert_one(data)
+    if lines:
+        lines = await _price_order_lines(data["id"], lines)
+        planned = sum(line["planned_qty"] * line["planned_rate"] for line in lines)
+        actual = sum(line["actual_qty"] * line["actual_rate"] for line in lines)
+        data.update(_order_status(round(planned, 2), round(actual, 2)), line_count=len(lines), last_line_no=len(lines))
+    else:
+        data.update(_order_status(data["planned_total"], data["actual_total"]))
+
+    async def write(session):
+        await orders_col.insert_one(data, session=session)
+        if lines:
+            await _insert_order_lines(lines, session)
+
+    await run_in_transaction(write)
     return await get_order_by_id(data["id"])
 
 
+def _order_totals_delta_update(planned: float, actual: float, line_count: int) -> list:
+    # Update pipeline: move the totals by one batch of lines and re-derive variance and status
+    total_fields = {"planned_total": planned, "actual_total": actual}
+    return [
+        {"$set": {
+            **{field: {"$round": [{"$add": [{"$ifNull": [f"${field}", 0]}, delta]}, 2]}
+               for field, delta in total_fields.items()},
+            "line_count": {"$add": [{"$ifNull": ["$line_count", 0]}, line_count]},
+            "last_line_no": {"$add": ["$last_line_no", line_count]},
+        }},
+        {"$set": {
+            "variance_total": {"$subtract": ["$actual_total", "$planned_total"]},
+            "status": {"$cond": [{"$gt": ["$actual_total", "$planned_total"]}, "Over Budget", "Under Budget"]},
+        }},
+    ]
+
+
+async def add_order_lines(order_id: int, lines: list):
+    """Append lines to an order and add them to its totals. Raises ValueError for unknown items.
+
+    One update on the order both reserves the line numbers (last_line_no) and moves
+    the totals by this batch, so concurrent appends can't reuse a line_no or
+    overwrite each other's totals; the line insert shares its transaction.
+    """
+    priced = await _price_order_lines(order_id, lines)
+    planned = sum(line["planned_qty"] * line["planned_rate"] for line in priced)
+    actual = sum(line["actual_qty"] * line["actual_rate"] for line in priced)
+
+    # Orders written before last_line_no existed start counting from their highest line
+    last = await order_lines_col.find_one({"order_id": order_id}, {"_id": 0, "line_no": 1}, sort=[("line_no", -1)])
+    await orders_col.update_one(
+        {"id": order_id, "last_line_no": {"$exists": False}},
+        {"$set": {"last_line_no": last["line_no"] if last else 0}},
+    )
+
+    async def write(session):
+        order = await orders_col.find_one_and_update(
+            {"id": order_id},
+            _order_totals_delta_update(planned, actual, len(priced)),
+            {"_id": 0, "last_line_no": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+        if order is None:
+            raise ValueError("Order not found")
+        first_line_no = order["last_line_no"] - len(priced) + 1
+        await _insert_order_lines(
+            [{**line, "line_no": first_line_no + offset} for offset, line in enumerate(priced)], session
+        )
+
+    await run_in_transaction(write)
+    return await get_order_by_id(order_id)
+
+
+async def get_order_lines(order_id: int):
+    cursor = order_lines_col.find({"order_id": order_id}, {"_id": 0}).sort("line_no", 1)
+    return await cursor.to_list(length=None)
+
+
+async def get_order_variance(order_id: int):
+    """Order variance attributed to each item's price and quantity effects.
+
+    Lines are grouped per item first, so the $lookup runs once per distinct item
+    rather than once per line.
+    """
+    order = await get_order_by_id(order_id)
+    if not order:
+        return None
+    amounts = variance_amount_exprs()
+    pipeline = [
+        {"$match": {"order_id": order_id}},
+        {"$group": {
+            "_id": "$item_id",
+            "lines": {"$sum": 1},
+            "planned_qty": {"$sum": "$planned_qty"},
+            "actual_qty": {"$sum": "$actual_qty"},
+            **{field: {"$sum": amounts[field]}
+               for field in ("planned_amount", "actual_amount", "price_variance", "qty_variance")},
+        }},
+        {"$lookup": {
+            "from": items_col.name,
+            "localField": "_id",
+            "foreignField": "id",
+            "pipeline": [{"$project": {"_id": 0, "name": 1, "unit": 1}}],
+            "as": "item",
+        }},
+        {"$project": {
+            "_id": 0,
+            "item_id": "$_id",
+            "name": {"$first": "$item.name"},
+            "unit": {"$first": "$item.unit"},
+            "lines": 1,
+            "planned_qty": 1,
+            "actual_qty": 1,
+            "planned_amount": {"$round": ["$planned_amount", 2]},
+            "actual_amount": {"$round": ["$actual_amount", 2]},
+            "variance": {"$round": [{"$subtract": ["$actual_amount", "$planned_amount"]}, 2]},
+            "price_variance": {"$round": ["$price_variance", 2]},
+            "qty_variance": {"$round": ["$qty_variance", 2]},
+        }},
+        {"$sort": {"variance": -1, "item_id": 1}},
+    ]
+    items = await order_lines_col.aggregate(pipeline).to_list(length=None)
+    price_variance = round(sum(row["price_variance"] for row in items), 2)
+    qty_variance = round(sum(row["qty_variance"] for row in items), 2)
+    return {
+        "order_id": order_id,
+        "order_code": order["order_code"],
+        "planned_total": order["planned_total"],
+        "actual_total": order["actual_total"],
+        "variance_total": order["variance_total"],
+        "price_variance": price_variance,
+        "qty_variance": qty_variance,
+        # Non-zero for orders whose totals were entered by hand rather than built from lines
+        "unattributed": round(order["variance_total"] - price_variance - qty_variance, 2),
+        "items": items,
+    }
+
+
  
 #  SUPPLIERS
  
 
-async def get_all_suppliers():
-    cursor = suppliers_col.find({}, {"_id": 0}).sort("id", 1)
-    return await cursor.to_list(length=100)
+async def get_all_suppliers(limit: int = None, after: int = None, fields: list = None):
+    key = ("page", limit, after, tuple(fields) if fields else None)
+    return await suppliers_cache.get_or_load(key, lambda: find_page(suppliers_col, limit, after, fields))
 
 
 async def get_supplier_by_id(supplier_id: int):
@@ -79,19 +988,217 @@ async def get_supplier_by_id(supplier_id: int):
 #  PURCHASE ORDERS
  
 
-async def get_all_purchase_orders():
-    cursor = purchase_orders_col.find({}, {"_id": 0}).sort("id", -1)
-    return await cursor.to_list(length=100)
+async def get_all_purchase_orders(limit: int = None, after: int = None, fields: list = None):
+    return await find_page(purchase_orders_col, limit, after, fields, descending=True)
+
+
+class PurchaseOrderConflict(ValueError):
+    pass
+
+
+async def _replay_purchase_order(po_number: str, idempotency_key: str = None):
+    """The stored PO a repeated request should get back; only a matching idempotency key replays.
+
+    Raises PurchaseOrderConflict when po_number already belongs to a different order.
+    """
+    if idempotency_key:
+        existing = await purchase_orders_col.find_one({"idempotency_key": idempotency_key}, {"_id": 0})
+        if existing:
+            return existing
+    if await purchase_orders_col.find_one({"po_number": po_number}, {"_id": 1}):
+        raise PurchaseOrderConflict(f"PO number {po_number} already belongs to another purchase order")
+    return None
 
 
-async def create_purchase_order(data: dict):
+async def create_purchase_order(data: dict, idempotency_key: str = None):
+    """Insert the PO and add its quantity to the item's stock as one unit.
+
+    Returns (po, created). A repeat of an earlier idempotency key returns the stored
+    PO with created=False and touches nothing; reusing an existing po_number under
+    another (or no) key raises PurchaseOrderConflict.
+    """
+    existing = await _replay_purchase_order(data["po_number"], idempotency_key)
+    if existing:
+        return existing, False
+
     data["id"] = await get_next_id(purchase_orders_col)
     data["created_at"] = datetime.now().isoformat()
-    await purchase_orders_col.insert_one(data)
-    return await purchase_orders_col.find_one({"id": data["id"]}, {"_id": 0})
+    if idempotency_key:
+        data["idempotency_key"] = idempotency_key
+
+    async def write(session):
+        # The unique po_number / idempotency_key indexes stop a racing duplicate here,
+        # which aborts the transaction before the stock moves
+        await purchase_orders_col.insert_one(data, session=session)
+        return await items_col.find_one_and_update(
+            {"name": data["item_name"]},
+            {"$inc": {"current_stock": data["order_qty"]}},
+            {"_id": 0, "id": 1},
+            session=session,
+        )
+
+    try:
+        item = await run_in_transaction(write)
+    except DuplicateKeyError:
+        existing = await _replay_purchase_order(data["po_number"], idempotency_key)
+        if not existing:
+            raise
+        return existing, False
+
+    items_cache.invalidate()
+    if item:
+        await refresh_item_analytics([item["id"]])
+    await refresh_supplier_performance(data["supplier_name"])
+    return await purchase_orders_col.find_one({"id": data["id"]}, {"_id": 0}), True
 
 
 async def update_purchase_order(po_number: str, data: dict):
     update_data = {k: v for k, v in data.items() if v is not None}
     await purchase_orders_col.update_one({"po_number": po_number}, {"$set": update_data})
-    return await purchase_orders_col.find_one({"po_number": po_number}, {"_id": 0})
+    po = await purchase_orders_col.find_one({"po_number": po_number}, {"_id": 0})
+    if po:
+        await refresh_supplier_performance(po["supplier_name"])
+    return po
+
+
+ 
+#  SUPPLIER PERFORMANCE (derived from purchase_orders)
+ 
+
+def _parse_date(field: str) -> dict:
+    # PO dates are "YYYY-MM-DD" strings and may be blank
+    return {"$dateFromString": {"dateString": field, "onError": None, "onNull": None}}
+
+
+def _price_drift_pipeline(match: list) -> list:
+    # Drift is only meaningful between POs for the same item: first vs last rate per
+    # (supplier, item) from the PO lines, then the mean over that supplier's items.
+    # Suppliers without two dated, priced POs for any one item get no drift at all.
+    return match + [
+        {"$set": {
+            "_po": _parse_date("$po_date"),
+            "_lines": {"$ifNull": ["$lines", [{"item_name": "$item_name", "unit_rate": "$unit_rate"}]]},
+        }},
+        {"$unwind": "$_lines"},
+        {"$match": {"_po": {"$ne": None}, "_lines.unit_rate": {"$gt": 0}}},
+        {"$group": {
+            "_id": {"supplier_name": "$supplier_name", "item_name": "$_lines.item_name"},
+            "po_count": {"$sum": 1},
+            "first_rate": {"$top": {"sortBy": {"_po": 1, "id": 1}, "output": "$_lines.unit_rate"}},
+            "last_rate": {"$bottom": {"sortBy": {"_po": 1, "id": 1}, "output": "$_lines.unit_rate"}},
+        }},
+        {"$match": {"po_count": {"$gte": 2}}},
+        {"$group": {
+            "_id": "$_id.supplier_name",
+            "drift_items": {"$sum": 1},
+            "price_drift_percent": {"$avg": {
+                "$multiply": [{"$divide": [{"$subtract": ["$last_rate", "$first_rate"]}, "$first_rate"]}, 100]
+            }},
+        }},
+        {"$project": {
+            "_id": 0,
+            "supplier_name": "$_id",
+            "drift_items": 1,
+            "price_drift_percent": {"$round": ["$price_drift_percent", 1]},
+        }},
+        {"$merge": {
+            "into": supplier_performance_col.name,
+            "on": "supplier_name",
+            "whenMatched": "merge",
+            "whenNotMatched": "discard",
+        }},
+    ]
+
+
+async def refresh_supplier_performance(supplier_name: str = None):
+    """Recompute supplier_performance for one supplier (or all): delivery stats with one
+    $group + $merge, then per-item price drift merged into the same documents."""
+    match = [{"$match": {"supplier_name": supplier_name}}] if supplier_name else []
+    pipeline = match + [
+        {"$set": {
+            "_po": _parse_date("$po_date"),
+            "_expected": _parse_date("$expected_delivery"),
+            "_delivered": _parse_date("$delivered_date"),
+        }},
+        {"$set": {
+            "_lead": {"$cond": [
+                {"$and": ["$_po", "$_delivered"]},
+                {"$dateDiff": {"startDate": "$_po", "endDate": "$_delivered", "unit": "day"}},
+                None,
+            ]},
+            "_on_time": {"$cond": [
+                {"$and": ["$_expected", "$_delivered"]},
+                {"$cond": [{"$lte": ["$_delivered", "$_expected"]}, 1, 0]},
+                None,
+            ]},
+        }},
+        {"$group": {
+            "_id": "$supplier_name",
+            "po_count": {"$sum": 1},
+            "delivered_count": {"$sum": {"$cond": [{"$eq": ["$_lead", None]}, 0, 1]}},
+            # $avg and $percentile skip the nulls left by undelivered POs
+            "on_time_rate": {"$avg": "$_on_time"},
+            "mean_lead_days": {"$avg": "$_lead"},
+            "p95_lead_days": {"$percentile": {"input": "$_lead", "p": [0.95], "method": "approximate"}},
+        }},
+        {"$project": {
+            "_id": 0,
+            "supplier_name": "$_id",
+            "po_count": 1,
+            "delivered_count": 1,
+            "on_time_rate": {"$round": ["$on_time_rate", 4]},
+            "mean_lead_days": {"$round": ["$mean_lead_days", 1]},
+            "p95_lead_days": {"$first": "$p95_lead_days"},
+            # Filled in by _price_drift_pipeline where there is a comparable pair
+            "price_drift_percent": {"$literal": None},
+            "drift_items": {"$literal": 0},
+            "refreshed_at": "$$NOW",
+        }},
+        {"$merge": {
+            "into": supplier_performance_col.name,
+            "on": "supplier_name",
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }},
+    ]
+    await purchase_orders_col.aggregate(pipeline).to_list(length=None)
+    await purchase_orders_col.aggregate(_price_drift_pipeline(match)).to_list(length=None)
+
+
+async def get_supplier_performance_stats():
+    cursor = supplier_performance_col.find({}, {"_id": 0})
+    return {doc["supplier_name"]: doc async for doc in cursor}
+
+
+async def create_replenishment_orders(window_days: int = None, respect_moq: bool = True, dry_run: bool = False):
+    """Raise one consolidated PO per supplier for everything below its reorder level."""
+    items = await get_all_items()
+    suppliers = await get_all_suppliers()
+    orders = plan_consolidated_orders(items, suppliers, window_days, respect_moq)
+    if dry_run or not orders:
+        return orders
+
+    first_id = await get_next_id(purchase_orders_col, len(orders))
+    created_at = datetime.now().isoformat()
+    for offset, order in enumerate(orders):
+        order["id"] = first_id + offset
+        order["po_number"] = f"PO-AUTO-{order['po_date'].replace('-', '')}-{order['id']}"
+        order["created_at"] = created_at
+    stock_ops = [
+        UpdateOne({"id": line["item_id"]}, {"$inc": {"current_stock": line["order_qty"]}})
+        for order in orders
+        for line in order["lines"]
+    ]
+
+    async def write(session):
+        # POs and the matching stock increments land together or not at all
+        await purchase_orders_col.insert_many(orders, session=session)
+        await items_col.bulk_write(stock_ops, ordered=False, session=session)
+
+    await run_in_transaction(write)
+    items_cache.invalidate()
+    await refresh_item_analytics([line["item_id"] for order in orders for line in order["lines"]])
+    for order in orders:
+        order.pop("_id", None)
+        await refresh_supplier_performance(order["supplier_name"])
+    return orders
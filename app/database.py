@@ -1,17 +1,31 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+from metrics import CommandTimer
 
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "inventory_intelligence")
 
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[CommandTimer()])
 db = client[DB_NAME]
 
+# Transactions need a replica set; IllegalOperation (20) means a standalone server
+TRANSACTIONS_UNSUPPORTED_CODES = (20,)
+
 # Collections
 items_col = db["inventory_items"]
 orders_col = db["orders"]
+order_lines_col = db["order_lines"]
 suppliers_col = db["suppliers"]
 production_plans_col = db["production_plans"]
 actual_consumptions_col = db["actual_consumptions"]
 supplier_performance_col = db["supplier_performance"]
 purchase_orders_col = db["purchase_orders"]
+counters_col = db["counters"]
+item_analytics_col = db["item_analytics"]
+portfolio_totals_col = db["portfolio_totals"]
+item_locations_col = db["item_locations"]
+bom_lines_col = db["bom_lines"]
+mrp_plans_col = db["mrp_plans"]
+mrp_runs_col = db["mrp_runs"]
+variance_snapshots_col = db["variance_snapshots"]
+variance_period_totals_col = db["variance_period_totals"]
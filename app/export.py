@@ -0,0 +1,39 @@
+import csv
+import io
+import orjson
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def _ndjson_lines(row_batches):
+    async for rows in row_batches:
+        yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+async def _csv_lines(row_batches):
+    buffer = io.StringIO()
+    writer = None
+    async for rows in row_batches:
+        if writer is None and rows:
+            # Header comes from the first row; every row of a report has the same keys
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+        if writer is not None:
+            writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_response(row_batches, fmt: str, filename: str) -> StreamingResponse:
+    """Stream an async iterator of row lists as NDJSON or CSV."""
+    lines = _csv_lines(row_batches) if fmt == "csv" else _ndjson_lines(row_batches)
+    return StreamingResponse(
+        lines,
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
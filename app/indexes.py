@@ -0,0 +1,152 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from database import (
+    db, items_col, orders_col, suppliers_col, purchase_orders_col, item_analytics_col,
+    actual_consumptions_col, supplier_performance_col, item_locations_col, production_plans_col, bom_lines_col,
+    mrp_plans_col, mrp_runs_col, variance_snapshots_col, variance_period_totals_col, order_lines_col,
+)
+
+# Collections that need options at creation time (Mongo won't convert them later)
+TIMESERIES_SPECS = {
+    actual_consumptions_col: {"timeField": "ts", "metaField": "item_id", "granularity": "hours"},
+}
+
+# Every query path in crud.py and the routers should be covered by one of these
+INDEX_SPECS = {
+    items_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("name", ASCENDING)], name="name"),
+    ],
+    orders_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    order_lines_col: [
+        IndexModel([("order_id", ASCENDING), ("line_no", ASCENDING)], name="order_line_unique", unique=True),
+        IndexModel([("item_id", ASCENDING)], name="item_id"),
+    ],
+    suppliers_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("supplier_name", ASCENDING)], name="supplier_name"),
+    ],
+    purchase_orders_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("po_number", ASCENDING)], name="po_number_unique", unique=True),
+        IndexModel(
+            [("idempotency_key", ASCENDING)],
+            name="idempotency_key_unique",
+            unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}},
+        ),
+        IndexModel([("supplier_name", ASCENDING)], name="supplier_name"),
+    ],
+    item_analytics_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("alert.risk_score", DESCENDING), ("id", ASCENDING)], name="risk_score"),
+        IndexModel([("alert.coverage_days", ASCENDING), ("id", ASCENDING)], name="coverage_days"),
+    ],
+    actual_consumptions_col: [
+        IndexModel([("item_id", ASCENDING), ("ts", ASCENDING)], name="item_ts"),
+    ],
+    supplier_performance_col: [
+        IndexModel([("supplier_name", ASCENDING)], name="supplier_name_unique", unique=True),
+    ],
+    item_locations_col: [
+        IndexModel([("item_id", ASCENDING), ("location", ASCENDING)], name="item_location_unique", unique=True),
+        IndexModel([("location", ASCENDING)], name="location"),
+    ],
+    production_plans_col: [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("due_date", ASCENDING)], name="due_date"),
+    ],
+    bom_lines_col: [
+        IndexModel([("parent_id", ASCENDING), ("component_id", ASCENDING)], name="parent_component_unique", unique=True),
+        IndexModel([("component_id", ASCENDING)], name="component_id"),
+    ],
+    mrp_plans_col: [
+        IndexModel([("item_id", ASCENDING)], name="item_id_unique", unique=True),
+        IndexModel([("planned_orders.release_date", ASCENDING)], name="release_date"),
+    ],
+    mrp_runs_col: [
+        IndexModel([("run_at", DESCENDING)], name="run_at"),
+    ],
+    variance_snapshots_col: [
+        IndexModel(
+            [("item_id", ASCENDING), ("period_type", ASCENDING), ("period_start", ASCENDING)],
+            name="item_period_unique",
+            unique=True,
+        ),
+        IndexModel([("period_type", ASCENDING), ("period_start", ASCENDING)], name="period"),
+    ],
+    variance_period_totals_col: [
+        IndexModel([("period_type", ASCENDING), ("period_start", ASCENDING)], name="period_unique", unique=True),
+    ],
+}
+
+
+async def ensure_collections(specs: dict = None) -> list:
+    """Create the time-series collections that don't exist yet."""
+    report = []
+    existing = set(await db.list_collection_names())
+    for collection, timeseries in (specs or TIMESERIES_SPECS).items():
+        if collection.name not in existing:
+            await db.create_collection(collection.name, timeseries=timeseries)
+        report.append({
+            "collection": collection.name,
+            "status": "verified" if collection.name in existing else "created",
+        })
+    return report
+
+
+# How many duplicate key groups a report lists per index
+DUPLICATE_SAMPLE_SIZE = 10
+
+
+async def find_duplicates(collection, model: IndexModel, limit: int = DUPLICATE_SAMPLE_SIZE) -> list:
+    """Key values that more than one document shares, which a unique index would reject."""
+    keys = list(model.document["key"])
+    pipeline = [
+        {"$group": {
+            "_id": {key: f"${key}" for key in keys},
+            "count": {"$sum": 1},
+            "doc_ids": {"$push": "$_id"},
+        }},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ]
+    if "partialFilterExpression" in model.document:
+        pipeline.insert(0, {"$match": model.document["partialFilterExpression"]})
+    return [
+        {"key": group["_id"], "count": group["count"], "doc_ids": [str(doc_id) for doc_id in group["doc_ids"]]}
+        async for group in collection.aggregate(pipeline, allowDiskUse=True)
+    ]
+
+
+async def ensure_indexes(specs: dict = None) -> list:
+    """Create any missing indexes and report what was created, already present or failed.
+
+    A unique index is only built once its keys are free of duplicates; otherwise it
+    is reported with status "duplicates" and a sample of the clashing keys so they can
+    be cleaned up, and the remaining indexes still get created.
+    """
+    report = []
+    for collection, models in (specs or INDEX_SPECS).items():
+        existing = set(await collection.index_information())
+        for model in models:
+            name = model.document["name"]
+            entry = {"collection": collection.name, "index": name}
+            if name in existing:
+                report.append({**entry, "status": "verified"})
+                continue
+            if model.document.get("unique"):
+                duplicates = await find_duplicates(collection, model)
+                if duplicates:
+                    report.append({**entry, "status": "duplicates", "duplicates": duplicates})
+                    continue
+            try:
+                await collection.create_indexes([model])
+            except OperationFailure as e:
+                report.append({**entry, "status": "failed", "error": str(e)})
+                continue
+            report.append({**entry, "status": "created"})
+    return report
@@ -0,0 +1,48 @@
+import asyncio
+import os
+import crud
+
+# Background jobs run inside the API process; an interval of 0 disables a job
+CONSUMPTION_RECOMPUTE_SECONDS = float(os.getenv("CONSUMPTION_RECOMPUTE_SECONDS", "0"))
+AUTO_REPLENISH_SECONDS = float(os.getenv("AUTO_REPLENISH_SECONDS", "0"))
+AUTO_REPLENISH_WINDOW_DAYS = int(os.getenv("AUTO_REPLENISH_WINDOW_DAYS", "2"))
+MRP_RUN_SECONDS = float(os.getenv("MRP_RUN_SECONDS", "0"))
+MRP_HORIZON_DAYS = int(os.getenv("MRP_HORIZON_DAYS", "90"))
+VARIANCE_SNAPSHOT_SECONDS = float(os.getenv("VARIANCE_SNAPSHOT_SECONDS", "0"))
+VARIANCE_SNAPSHOT_PERIOD = os.getenv("VARIANCE_SNAPSHOT_PERIOD", "month")
+
+
+async def auto_replenish():
+    await crud.create_replenishment_orders(window_days=AUTO_REPLENISH_WINDOW_DAYS)
+
+
+async def run_mrp():
+    await crud.run_mrp(MRP_HORIZON_DAYS)
+
+
+async def capture_variance_snapshots():
+    await crud.capture_variance_snapshots(VARIANCE_SNAPSHOT_PERIOD)
+
+
+async def run_every(seconds: float, job, name: str):
+    while True:
+        await asyncio.sleep(seconds)
+        try:
+            await job()
+        except Exception as e:
+            # Keep the loop alive; the next tick retries
+            print(f"✗ Job {name} failed: {e}")
+
+
+def start_jobs() -> list:
+    schedule = [
+        (CONSUMPTION_RECOMPUTE_SECONDS, crud.recompute_daily_consumption, "recompute_daily_consumption"),
+        (AUTO_REPLENISH_SECONDS, auto_replenish, "auto_replenish"),
+        (MRP_RUN_SECONDS, run_mrp, "run_mrp"),
+        (VARIANCE_SNAPSHOT_SECONDS, capture_variance_snapshots, "capture_variance_snapshots"),
+    ]
+    return [
+        asyncio.create_task(run_every(seconds, job, name))
+        for seconds, job, name in schedule
+        if seconds > 0
+    ]
@@ -0,0 +1,146 @@
+import asyncio
+import orjson
+from pymongo.errors import OperationFailure, PyMongoError
+from cache import items_cache
+from database import items_col, purchase_orders_col
+from services.reorder_engine import build_reorder_alerts_batch
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+DATE_FIELDS = ("stockout_date", "order_by_date", "delivery_date")
+# Change streams need a replica set; a standalone server answers with this code
+CHANGE_STREAMS_UNSUPPORTED_CODES = (40573,)
+WATCH_RETRY_MIN_SECONDS = 1
+WATCH_RETRY_MAX_SECONDS = 60
+
+
+class EventBus:
+    """In-memory fan-out: one bounded queue per subscriber."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A consumer this far behind has lost diffs; end its stream so it resyncs
+                self.unsubscribe(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+def _changed_fields(old: dict, new: dict) -> dict:
+    changed = {}
+    for key, value in new.items():
+        if key in DATE_FIELDS:
+            # Dates move with the clock; only a different day is a change
+            if old.get(key, "")[:10] != value[:10]:
+                changed[key] = value
+        elif old.get(key) != value:
+            changed[key] = value
+    return changed
+
+
+class AlertFeed:
+    """Recomputes reorder alerts for changed items only and publishes the diffs."""
+
+    def __init__(self, bus: EventBus):
+        self.bus = bus
+        self.last = {}
+        self.object_ids = {}
+
+    def publish_items(self, items: list, deleted_ids: list = ()):
+        if not self.bus.subscribers:
+            return
+        for item in items:
+            if "_id" in item:
+                self.object_ids[item["_id"]] = item["id"]
+        for alert in build_reorder_alerts_batch(items):
+            changed = _changed_fields(self.last.get(alert["id"], {}), alert)
+            self.last[alert["id"]] = alert
+            if changed:
+                self.bus.publish({"type": "alert", "id": alert["id"], "changes": changed})
+        for item_id in deleted_ids:
+            if self.last.pop(item_id, None) is not None:
+                self.bus.publish({"type": "deleted", "id": item_id})
+
+    async def _watch_items(self):
+        async with items_col.watch(full_document="updateLookup") as stream:
+            # Writes from other workers only reach this process through the stream, and
+            # any made while it was down were missed, so start from an empty cache
+            items_cache.invalidate()
+            async for change in stream:
+                items_cache.invalidate()
+                if change["operationType"] == "delete":
+                    item_id = self.object_ids.pop(change["documentKey"]["_id"], None)
+                    if item_id is not None:
+                        self.publish_items([], [item_id])
+                elif change.get("fullDocument"):
+                    self.publish_items([change["fullDocument"]])
+
+    async def _watch_purchase_orders(self):
+        # Covers stock receipts written by other workers; in-process ones arrive via crud
+        async with purchase_orders_col.watch([{"$match": {"operationType": "insert"}}]) as stream:
+            async for change in stream:
+                order = change["fullDocument"]
+                # A consolidated PO names its items per line instead of at the top level
+                if "lines" in order:
+                    query = {"id": {"$in": [line["item_id"] for line in order["lines"]]}}
+                elif order.get("item_name"):
+                    query = {"name": order["item_name"]}
+                else:
+                    continue
+                items = await items_col.find(query).to_list(length=None)
+                if items:
+                    self.publish_items(items)
+
+    async def _watch_with_retry(self, watcher):
+        # Reopen a dropped stream with exponential backoff; a stream that ran for a
+        # while before failing starts again from the shortest delay
+        delay = WATCH_RETRY_MIN_SECONDS
+        while True:
+            started = asyncio.get_running_loop().time()
+            try:
+                await watcher()
+                return
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED_CODES:
+                    raise
+                error = e
+            except PyMongoError as e:
+                error = e
+            if asyncio.get_running_loop().time() - started > WATCH_RETRY_MAX_SECONDS:
+                delay = WATCH_RETRY_MIN_SECONDS
+            print(f"✗ {watcher.__name__} stopped, retrying in {delay}s: {error}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WATCH_RETRY_MAX_SECONDS)
+
+    async def watch(self):
+        """Follow Mongo change streams; without a replica set, crud's direct publishes are the feed."""
+        results = await asyncio.gather(
+            self._watch_with_retry(self._watch_items),
+            self._watch_with_retry(self._watch_purchase_orders),
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            print(f"✗ Change streams unavailable, using in-process events only: {errors[0]}")
+
+
+def format_sse(event: dict) -> str:
+    return f"data: {orjson.dumps(event).decode()}\n\n"
+
+
+event_bus = EventBus()
+alert_feed = AlertFeed(event_bus)
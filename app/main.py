@@ -1,17 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from seed import seed_database
+from crud import sync_id_counters, rebuild_item_analytics, refresh_supplier_performance
+from indexes import ensure_collections, ensure_indexes
+from pagination import NEXT_CURSOR_HEADER
+from cache import items_cache, suppliers_cache
+from live import alert_feed
+from jobs import start_jobs
+import metrics
+import time
+from services.montecarlo import shutdown_executor
 
-from routers import dashboard, items, variance, reorder, orders, suppliers, purchase_orders, simulation
+from routers import dashboard, items, variance, reorder, orders, suppliers, purchase_orders, simulation, consumption, locations, production, mrp
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: seed database
+    # Startup: collections and indexes first so seeding already respects the unique keys
+    for entry in await ensure_collections():
+        print(f"✓ Time-series collection {entry['collection']} {entry['status']}")
+    for entry in await ensure_indexes():
+        if entry["status"] == "duplicates":
+            print(f"✗ Index {entry['collection']}.{entry['index']} skipped, duplicate keys: {entry['duplicates']}")
+        elif entry["status"] == "failed":
+            print(f"✗ Index {entry['collection']}.{entry['index']} failed: {entry['error']}")
+        else:
+            print(f"✓ Index {entry['collection']}.{entry['index']} {entry['status']}")
     await seed_database()
+    await sync_id_counters()
+    await rebuild_item_analytics()
+    await refresh_supplier_performance()
+    tasks = [asyncio.create_task(alert_feed.watch()), *start_jobs()]
     yield
-    # Shutdown: nothing needed
+    # Shutdown: stop the change-stream watcher, background jobs and Monte Carlo worker processes
+    for task in tasks:
+        task.cancel()
+    shutdown_executor()
 
 
 app = FastAPI(
@@ -19,6 +46,7 @@ app = FastAPI(
     description="Backend for Inventory Reorder Prediction + Cost Variance Analysis System",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS — allow frontend dev server
@@ -28,8 +56,62 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Idempotent-Replayed", "Server-Timing"],
 )
 
+
+
+# Per-route latency, Mongo round trips/documents and service time; optional profiling
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    stats = metrics.RequestStats()
+    token = metrics.current_request.set(stats)
+    profiler = request.headers.get("X-Profile") if metrics.PROFILING_ENABLED else None
+    started = time.perf_counter()
+    try:
+        if profiler:
+            response = await _profiled(profiler, call_next, request)
+        else:
+            response = await call_next(request)
+    finally:
+        metrics.current_request.reset(token)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    metrics.observe_request(request.method, route.path if route else "unmatched", response.status_code, elapsed, stats)
+    response.headers["Server-Timing"] = (
+        f"total;dur={elapsed * 1000:.1f}, mongo;dur={stats.mongo_seconds * 1000:.1f}, "
+        f"calc;dur={stats.calc_seconds * 1000:.1f}"
+    )
+    return response
+
+
+async def _profiled(profiler: str, call_next, request: Request):
+    """X-Profile: cprofile | pyinstrument — returns the profile instead of the normal body."""
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        profile = Profiler(async_mode="enabled")
+        profile.start()
+        response = await call_next(request)
+        async for _ in response.body_iterator:
+            pass
+        profile.stop()
+        return PlainTextResponse(profile.output_text(), status_code=response.status_code)
+
+    import cProfile
+    import io
+    import pstats
+    profile = cProfile.Profile()
+    profile.enable()
+    response = await call_next(request)
+    async for _ in response.body_iterator:
+        pass
+    profile.disable()
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(40)
+    return PlainTextResponse(out.getvalue(), status_code=response.status_code)
+
+
 # Register routers
 app.include_router(dashboard.router)
 app.include_router(items.router)
@@ -39,8 +121,22 @@ app.include_router(orders.router)
 app.include_router(suppliers.router)
 app.include_router(purchase_orders.router)
 app.include_router(simulation.router)
+app.include_router(consumption.router)
+app.include_router(locations.router)
+app.include_router(production.router)
+app.include_router(mrp.router)
 
 
 @app.get("/")
 async def root():
     return {"message": "Inventory Intelligence API is running", "docs": "/docs"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    return [items_cache.stats(), suppliers_cache.stats()]
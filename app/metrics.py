@@ -0,0 +1,152 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from pymongo import monitoring
+
+# Opt-in: the X-Profile request header is ignored unless this is set
+PROFILING_ENABLED = os.getenv("METRICS_PROFILING_ENABLED", "0") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 50000, 100000)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by a label tuple. Thread-safe:
+    Mongo command events arrive on Motor's executor threads."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            entry = self.series.get(labels)
+            if entry is None:
+                # [cumulative bucket counts, sum, count]
+                entry = self.series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for labels, (counts, total, count) in sorted(self.series.items()):
+                base = ",".join(f'{k}="{v}"' for k, v in zip(self.label_names, labels))
+                sep = "," if base else ""
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{base}}} {total}")
+                lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route", ("method", "route", "status"))
+REQUEST_MONGO_SECONDS = Histogram(
+    "http_request_mongo_seconds", "Time spent in Mongo commands per request", ("route",))
+REQUEST_MONGO_COMMANDS = Histogram(
+    "http_request_mongo_commands", "Mongo round trips per request", ("route",), COUNT_BUCKETS)
+REQUEST_DOCUMENTS = Histogram(
+    "http_request_documents_fetched", "Documents returned by Mongo per request", ("route",), COUNT_BUCKETS)
+REQUEST_CALC_SECONDS = Histogram(
+    "http_request_calc_seconds", "Time spent in timed service functions per request", ("route",))
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds", "Mongo command latency", ("command",))
+CALC_SECONDS = Histogram(
+    "calc_duration_seconds", "Service function latency", ("function",))
+
+ALL_HISTOGRAMS = (
+    REQUEST_SECONDS, REQUEST_MONGO_SECONDS, REQUEST_MONGO_COMMANDS, REQUEST_DOCUMENTS,
+    REQUEST_CALC_SECONDS, MONGO_COMMAND_SECONDS, CALC_SECONDS,
+)
+
+
+# ── Per-request accumulator, visible to Motor's executor threads via contextvars ──
+class RequestStats:
+    __slots__ = ("mongo_seconds", "mongo_commands", "documents", "calc_seconds")
+
+    def __init__(self):
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+        self.documents = 0
+        self.calc_seconds = 0.0
+
+
+current_request = contextvars.ContextVar("current_request", default=None)
+_inside_timed = contextvars.ContextVar("inside_timed", default=False)
+
+
+def timed(name: str):
+    """Record a service function's duration globally and against the current request."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            # Only the outermost timed call counts towards the request, so nesting isn't double-counted
+            outermost = not _inside_timed.get()
+            token = _inside_timed.set(True)
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                _inside_timed.reset(token)
+                CALC_SECONDS.observe(elapsed, name)
+                stats = current_request.get()
+                if outermost and stats is not None:
+                    stats.calc_seconds += elapsed
+        return wrapper
+    return decorator
+
+
+def _documents_in(reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    if "value" in reply:  # findAndModify
+        return 1 if reply["value"] else 0
+    return 0
+
+
+class CommandTimer(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, _documents_in(event.reply))
+
+    def failed(self, event):
+        self._record(event, 0)
+
+    def _record(self, event, documents: int):
+        seconds = event.duration_micros / 1_000_000
+        MONGO_COMMAND_SECONDS.observe(seconds, event.command_name)
+        stats = current_request.get()
+        if stats is not None:
+            stats.mongo_seconds += seconds
+            stats.mongo_commands += 1
+            stats.documents += documents
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, stats: RequestStats):
+    REQUEST_SECONDS.observe(seconds, method, route, str(status))
+    REQUEST_MONGO_SECONDS.observe(stats.mongo_seconds, route)
+    REQUEST_MONGO_COMMANDS.observe(stats.mongo_commands, route)
+    REQUEST_DOCUMENTS.observe(stats.documents, route)
+    REQUEST_CALC_SECONDS.observe(stats.calc_seconds, route)
+
+
+def render_metrics() -> str:
+    lines = []
+    for histogram in ALL_HISTOGRAMS:
+        lines += histogram.render()
+    return "\n".join(lines) + "\n"
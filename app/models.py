@@ -18,7 +18,8 @@
 #   "supplier_name": "Rajesh Textiles",
 #   "production_value": 4200,
 #   "worker_cost": 1800,
-#   "delay_history": 2
+#   "delay_history": 2,
+#   "min_order_qty": 0          (optional, used by auto-replenishment)
 # }
 
 # orders document shape:
@@ -31,6 +32,18 @@
 #   "variance_total": 3200,
 #   "status": "Over Budget"
 # }
+# Orders created with lines get their totals from the lines.
+
+# order_lines document shape (one per order line; rates are frozen from the item when the line is added):
+# {
+#   "order_id": 1,
+#   "line_no": 1,
+#   "item_id": 1,
+#   "planned_qty": 40,
+#   "planned_rate": 250,
+#   "actual_qty": 44,
+#   "actual_rate": 260
+# }
 
 # suppliers document shape:
 # {
@@ -64,6 +77,154 @@
 #   "discount": 0,
 #   "supplier_name": "...",
 #   "supplier_contact": "...",
+#   "expected_delivery": "2024-02-22",
+#   "delivered_date": "2024-02-23",
 #   "total_amount": ...,
 #   "created_at": "..."
 # }
+
+# counters document shape (one per collection, used by crud.get_next_id):
+# {
+#   "_id": "inventory_items",
+#   "seq": 5
+# }
+
+# item_analytics document shape (one per item, maintained by crud on every item write):
+# {
+#   "id": 1,
+#   "alert": { ...row of /api/reorder/alerts... },
+#   "variance": { ...row of /api/variance/report... },
+#   "production_loss": { ...calc_production_loss result... },
+#   "totals": {"planned_cost": 25000, "actual_cost": 28600, "items_at_risk": 1,
+#              "risk_score_sum": 37, "item_count": 1}
+# }
+
+# portfolio_totals document shape (sum of every item_analytics "totals"):
+# {
+#   "_id": "portfolio",
+#   "planned_cost": 47300,
+#   "actual_cost": 52650,
+#   "items_at_risk": 4,
+#   "risk_score_sum": 201,
+#   "item_count": 5
+# }
+
+# actual_consumptions document shape (time-series collection, metaField item_id):
+# {
+#   "ts": ISODate("2024-02-18T09:15:00Z"),
+#   "item_id": 1,
+#   "qty": 12.5,
+#   "source": "scanner-3"
+# }
+
+# consolidated purchase_orders document shape (crud.create_replenishment_orders):
+# same header fields as above, one PO per supplier, with the items in "lines":
+# {
+#   "po_number": "PO-AUTO-20240218-42",
+#   "supplier_name": "Rajesh Textiles",
+#   "lines": [
+#     {"item_id": 1, "item_name": "Fabric", "item_code": "ITM-001", "unit": "kg",
+#      "current_stock": 200, "reorder_level": 240, "order_qty": 40, "unit_rate": 260,
+#      "gst_percent": 18, "line_total": 10400, "order_by_date": "2024-02-19"}
+#   ],
+#   "line_count": 1,
+#   "total_amount": 12272.0,
+#   ...
+# }
+
+# supplier_performance document shape (derived from purchase_orders by crud.refresh_supplier_performance):
+# {
+#   "supplier_name": "Rajesh Textiles",
+#   "po_count": 12,
+#   "delivered_count": 10,
+#   "on_time_rate": 0.8,
+#   "mean_lead_days": 4.6,
+#   "p95_lead_days": 7,
+#   "price_drift_percent": 4.0,
+#   "refreshed_at": ISODate("...")
+# }
+
+# item_locations document shape (stock per plant/store; one per item and location):
+# {
+#   "item_id": 1,
+#   "location": "Plant-Chennai",
+#   "current_stock": 120,
+#   "daily_consumption": 25,
+#   "safety_stock": 40,
+#   "lead_time_days": 4          (optional, defaults to the item's lead_time_days)
+# }
+
+# production_plans document shape (what we intend to build, and when):
+# {
+#   "id": 1,
+#   "item_id": 101,
+#   "qty": 500,
+#   "due_date": "2024-03-01"
+# }
+
+# bom_lines document shape (one per parent/component pair; parents can be components of other parents):
+# {
+#   "parent_id": 101,
+#   "component_id": 1,
+#   "qty_per": 1.6,
+#   "scrap_pct": 5,              (optional)
+#   "offset_days": 2             (optional, component is needed this many days before the parent)
+# }
+
+# mrp_plans document shape (one per item, replaced by every crud.run_mrp):
+# {
+#   "item_id": 1,
+#   "name": "Fabric",
+#   "supplier_name": "Rajesh Textiles",
+#   "on_hand": 160,              (current_stock less open purchase orders)
+#   "gross_total": 3600,
+#   "receipts_total": 40,
+#   "planned_total": 3520,
+#   "min_projected": 80,
+#   "ending_projected": 200,
+#   "planned_orders": [
+#     {"release_date": "2024-02-18", "receipt_date": "2024-02-22", "qty": 280, "past_due": false}
+#   ],
+#   "run_at": ISODate("...")
+# }
+
+# mrp_runs document shape (one per run):
+# {
+#   "run_at": ISODate("..."),
+#   "start_date": "2024-02-18",
+#   "horizon_days": 90,
+#   "order_cycle_days": 7,
+#   "items": 5,
+#   "planned_orders": 64,
+#   "past_due_orders": 2,
+#   "seconds": 0.12
+# }
+
+# variance_snapshots document shape (one per item per week/month; only the open period is ever rewritten):
+# {
+#   "item_id": 1,
+#   "period_type": "month",
+#   "period": "2024-02",
+#   "period_start": ISODate("2024-02-01T00:00:00Z"),
+#   "name": "Fabric",
+#   "unit": "kg",
+#   "planned_qty": 100,
+#   "planned_rate": 250,
+#   "actual_qty": 110,
+#   "actual_rate": 260,
+#   "captured_at": ISODate("...")
+# }
+
+# variance_period_totals document shape (catalog roll-up of one period's snapshots):
+# {
+#   "period_type": "month",
+#   "period": "2024-02",
+#   "period_start": ISODate("2024-02-01T00:00:00Z"),
+#   "items": 5,
+#   "planned_amount": 47300,
+#   "actual_amount": 52650,
+#   "price_variance": 2440,
+#   "qty_variance": 2910,
+#   "standard_actual_amount": 50210,
+#   "captured_at": ISODate("...")
+# }
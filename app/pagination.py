@@ -0,0 +1,24 @@
+from fastapi import Query, Response
+from typing import Optional
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_params(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[int] = Query(None, description="Return rows after this id (value of X-Next-Cursor)"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+) -> dict:
+    return {
+        "limit": limit,
+        "after": after,
+        "fields": [f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+    }
+
+
+def set_next_cursor(response: Response, rows: list, limit: int):
+    # A full page means there may be more; the client passes the last id back as `after`
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1]["id"])
@@ -0,0 +1,58 @@
+import json
+from fastapi import APIRouter, Query, Request
+from pydantic import ValidationError
+import crud
+from schemas import ConsumptionEvent
+
+router = APIRouter(prefix="/api/consumption", tags=["Consumption"])
+
+
+@router.post("/events")
+async def ingest_events(events: list[ConsumptionEvent]):
+    inserted = await crud.insert_consumption_events([e.model_dump() for e in events])
+    return {"inserted": inserted}
+
+
+@router.post("/events/ndjson")
+async def ingest_events_ndjson(request: Request):
+    """Scanner feeds: one event per line, flushed to Mongo every CONSUMPTION_CHUNK_SIZE lines."""
+    inserted, errors, row, pending, buffer = 0, [], 0, [], b""
+
+    def parse(line: bytes):
+        nonlocal row
+        try:
+            pending.append(ConsumptionEvent.model_validate(json.loads(line)).model_dump())
+        except ValidationError as e:
+            errors.append({"row": row, "error": e.errors(include_url=False, include_input=False, include_context=False)})
+        except ValueError as e:
+            errors.append({"row": row, "error": str(e)})
+        row += 1
+
+    async for chunk in request.stream():
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        for line in complete:
+            if line.strip():
+                parse(line)
+        if len(pending) >= crud.CONSUMPTION_CHUNK_SIZE:
+            inserted += await crud.insert_consumption_events(pending)
+            pending = []
+    if buffer.strip():
+        parse(buffer)
+    if pending:
+        inserted += await crud.insert_consumption_events(pending)
+    return {"inserted": inserted, "errors": errors}
+
+
+@router.post("/recompute")
+async def recompute_daily_consumption(
+    window_days: int = Query(28, ge=1, le=365),
+    method: str = Query("ewma", pattern="^(ewma|rolling)$"),
+    alpha: float = Query(0.3, gt=0, le=1),
+):
+    return await crud.recompute_daily_consumption(window_days, method, alpha)
+
+
+@router.get("/{item_id}/daily")
+async def daily_consumption(item_id: int, days: int = Query(30, ge=1, le=365)):
+    return await crud.get_daily_consumption(item_id, days)
@@ -1,13 +1,78 @@
-from fastapi import APIRouter
+import json
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 import crud
-from schemas import ItemCreate, ItemUpdate
+from pagination import page_params, set_next_cursor
+from schemas import ItemCreate, ItemUpdate, ItemBulkUpdate, ItemOut
 
 router = APIRouter(prefix="/api/items", tags=["Items"])
 
 
-@router.get("")
-async def list_items():
-    return await crud.get_all_items()
+@router.get("", response_model=list[ItemOut])
+async def list_items(page: dict = Depends(page_params)):
+    rows = await crud.get_all_items(**page)
+    response = ORJSONResponse(rows)
+    set_next_cursor(response, rows, page["limit"])
+    return response
+
+
+# ── Bulk endpoints (declared before /{item_id} so "bulk" is not read as an id) ──
+
+@router.post("/bulk")
+async def bulk_create_items(items: list[ItemCreate]):
+    return await crud.bulk_create_items([item.model_dump() for item in items])
+
+
+@router.put("/bulk")
+async def bulk_update_items(items: list[ItemBulkUpdate]):
+    return await crud.bulk_update_items([item.model_dump(exclude_unset=True) for item in items])
+
+
+async def _apply_ndjson_chunk(lines: list, start_row: int) -> list:
+    # Lines carrying an "id" are updates, the rest are new items
+    creates, updates, results = [], [], []
+    for offset, line in enumerate(lines):
+        row = start_row + offset
+        try:
+            payload = json.loads(line)
+            if not isinstance(payload, dict):
+                raise ValueError(f"Expected a JSON object, got {type(payload).__name__}")
+            if "id" in payload:
+                updates.append((row, ItemBulkUpdate.model_validate(payload).model_dump(exclude_unset=True)))
+            else:
+                creates.append((row, ItemCreate.model_validate(payload).model_dump()))
+        except ValidationError as e:
+            error = e.errors(include_url=False, include_input=False, include_context=False)
+            results.append({"row": row, "id": None, "status": "error", "error": error})
+        except ValueError as e:
+            results.append({"row": row, "id": None, "status": "error", "error": str(e)})
+
+    for rows, apply in ((creates, crud.bulk_create_items), (updates, crud.bulk_update_items)):
+        if rows:
+            applied = await apply([data for _, data in rows])
+            for (row, _), result in zip(rows, applied):
+                result["row"] = row
+            results.extend(applied)
+    return sorted(results, key=lambda r: r["row"])
+
+
+@router.post("/bulk/ndjson")
+async def bulk_import_ndjson(request: Request):
+    results, lines, row, buffer = [], [], 0, b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *complete, buffer = buffer.split(b"\n")
+        lines.extend(line for line in complete if line.strip())
+        if len(lines) >= crud.BULK_CHUNK_SIZE:
+            results.extend(await _apply_ndjson_chunk(lines, row))
+            row += len(lines)
+            lines = []
+    if buffer.strip():
+        lines.append(buffer)
+    if lines:
+        results.extend(await _apply_ndjson_chunk(lines, row))
+    return results
 
 
 @router.get("/{item_id}")
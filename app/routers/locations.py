@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import crud
+from schemas import LocationStock
+
+router = APIRouter(prefix="/api/locations", tags=["Locations"])
+
+
+@router.put("/stock")
+async def upsert_location_stock(rows: list[LocationStock]):
+    return await crud.upsert_location_stock([row.model_dump() for row in rows])
+
+
+@router.get("/plan")
+async def location_plan(
+    item_id: Optional[list[int]] = Query(None),
+    include_locations: bool = Query(False, description="Also return the per-location rows"),
+):
+    """Transfers between locations first; external_qty is what still has to be ordered."""
+    plan = await crud.get_location_plan(item_id)
+    if not include_locations:
+        plan.pop("locations")
+    return ORJSONResponse(plan)
+
+
+@router.get("/{item_id}")
+async def item_locations(item_id: int):
+    stock = await crud.get_item_locations(item_id)
+    plan = await crud.get_location_plan([item_id])
+    return {"stock": stock, **plan}
@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
+import crud
+from services.mrp import DEFAULT_ORDER_CYCLE_DAYS
+
+router = APIRouter(prefix="/api/mrp", tags=["MRP"])
+
+
+@router.post("/run")
+async def run_mrp(
+    horizon_days: int = Query(90, ge=1, le=365),
+    order_cycle_days: int = Query(DEFAULT_ORDER_CYCLE_DAYS, ge=1, le=90, description="1 = lot-for-lot"),
+):
+    return await crud.run_mrp(horizon_days, order_cycle_days)
+
+
+@router.get("/runs/latest")
+async def latest_mrp_run():
+    return await crud.get_latest_mrp_run()
+
+
+@router.get("/planned-orders")
+async def planned_orders(
+    release_within_days: int = Query(7, ge=0, le=365),
+    item_id: Optional[int] = Query(None),
+):
+    """Planned order releases from the last run, past-due ones first."""
+    return ORJSONResponse(await crud.get_planned_orders(release_within_days, item_id))
+
+
+@router.get("/items/{item_id}")
+async def item_mrp(
+    item_id: int,
+    horizon_days: int = Query(90, ge=1, le=365),
+    order_cycle_days: int = Query(DEFAULT_ORDER_CYCLE_DAYS, ge=1, le=90),
+):
+    record = await crud.get_item_mrp(item_id, horizon_days, order_cycle_days)
+    if not record:
+        return {"error": "Item not found"}
+    return record
@@ -1,13 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
 import crud
-from schemas import OrderCreate
+from pagination import page_params, set_next_cursor
+from schemas import OrderCreate, OrderLineCreate
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
 
 @router.get("")
-async def list_orders():
-    return await crud.get_all_orders()
+async def list_orders(response: Response, page: dict = Depends(page_params)):
+    rows = await crud.get_all_orders(**page)
+    set_next_cursor(response, rows, page["limit"])
+    return rows
 
 
 @router.get("/{order_id}")
@@ -29,6 +32,33 @@ async def order_summary(order_id: int):
     }
 
 
+@router.get("/{order_id}/lines")
+async def order_lines(order_id: int):
+    return await crud.get_order_lines(order_id)
+
+
+@router.post("/{order_id}/lines")
+async def add_order_lines(order_id: int, lines: list[OrderLineCreate]):
+    if not await crud.get_order_by_id(order_id):
+        return {"error": "Order not found"}
+    try:
+        return await crud.add_order_lines(order_id, [line.model_dump() for line in lines])
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@router.get("/{order_id}/variance")
+async def order_variance(order_id: int):
+    """Per-item price and quantity effects behind the order's variance."""
+    drilldown = await crud.get_order_variance(order_id)
+    if not drilldown:
+        return {"error": "Order not found"}
+    return drilldown
+
+
 @router.post("")
 async def create_order(order: OrderCreate):
-    return await crud.create_order(order.model_dump())
+    try:
+        return await crud.create_order(order.model_dump())
+    except ValueError as e:
+        return {"error": str(e)}
@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, Query, Response
+import crud
+from pagination import page_params, set_next_cursor
+from schemas import BomLine, ProductionPlanCreate
+from services.bom import BomCycleError
+
+router = APIRouter(prefix="/api/production", tags=["Production"])
+
+
+@router.get("/plans")
+async def list_production_plans(response: Response, page: dict = Depends(page_params)):
+    rows = await crud.get_all_production_plans(**page)
+    set_next_cursor(response, rows, page["limit"])
+    return rows
+
+
+@router.post("/plans")
+async def create_production_plans(plans: list[ProductionPlanCreate]):
+    return await crud.create_production_plans([plan.model_dump() for plan in plans])
+
+
+@router.post("/plans/{plan_id}/complete")
+async def complete_production_plan(plan_id: int):
+    plan = await crud.complete_production_plan(plan_id)
+    if not plan:
+        return {"error": "Production plan not found"}
+    return plan
+
+
+@router.delete("/plans/{plan_id}")
+async def delete_production_plan(plan_id: int):
+    return {"deleted": await crud.delete_production_plan(plan_id)}
+
+
+@router.get("/bom")
+async def list_bom_lines(parent_id: int = Query(None)):
+    return await crud.get_bom_lines(parent_id)
+
+
+@router.put("/bom")
+async def upsert_bom_lines(lines: list[BomLine]):
+    try:
+        return await crud.upsert_bom_lines([line.model_dump() for line in lines])
+    except BomCycleError as e:
+        return {"error": str(e)}
+
+
+@router.delete("/bom/{parent_id}/{component_id}")
+async def delete_bom_line(parent_id: int, component_id: int):
+    return {"deleted": await crud.delete_bom_line(parent_id, component_id)}
+
+
+@router.get("/requirements")
+async def material_requirements(horizon_days: int = Query(90, ge=1, le=365)):
+    """Day-by-day raw material requirements exploded from the production plans."""
+    return await crud.get_material_requirements(horizon_days)
+
+
+@router.post("/requirements/apply")
+async def apply_planned_consumption(horizon_days: int = Query(90, ge=1, le=365)):
+    """Replace daily_consumption of planned raw materials with their average planned requirement."""
+    return await crud.apply_planned_consumption(horizon_days)
@@ -1,27 +1,45 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Header, Query, Response
+from typing import Optional
 import crud
+from pagination import page_params, set_next_cursor
 from schemas import PurchaseOrderCreate
-from database import items_col
 
 router = APIRouter(prefix="/api/purchase-orders", tags=["Purchase Orders"])
 
 
 @router.get("")
-async def list_purchase_orders():
-    return await crud.get_all_purchase_orders()
+async def list_purchase_orders(response: Response, page: dict = Depends(page_params)):
+    rows = await crud.get_all_purchase_orders(**page)
+    set_next_cursor(response, rows, page["limit"])
+    return rows
 
 
 @router.post("/create")
-async def create_purchase_order(po: PurchaseOrderCreate):
-    result = await crud.create_purchase_order(po.model_dump())
-    # Increase item stock by ordered quantity
-    await items_col.update_one(
-        {"name": po.item_name},
-        {"$inc": {"current_stock": po.order_qty}},
-    )
+async def create_purchase_order(
+    po: PurchaseOrderCreate,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None, max_length=200),
+):
+    # Stock is increased by the ordered quantity in the same transaction as the insert
+    try:
+        result, created = await crud.create_purchase_order(po.model_dump(), idempotency_key)
+    except crud.PurchaseOrderConflict as e:
+        response.status_code = 409
+        return {"error": str(e)}
+    if not created:
+        response.headers["Idempotent-Replayed"] = "true"
     return result
 
 
+@router.post("/auto-replenish")
+async def auto_replenish(
+    window_days: Optional[int] = Query(None, ge=0, le=365, description="Only items due to be ordered within this many days"),
+    respect_moq: bool = True,
+    dry_run: bool = False,
+):
+    return await crud.create_replenishment_orders(window_days, respect_moq, dry_run)
+
+
 @router.put("/{po_number}")
 async def update_purchase_order(po_number: str, data: dict):
     return await crud.update_purchase_order(po_number, data)
@@ -1,11 +1,96 @@
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Optional
 import crud
-from services.reorder import build_reorder_alerts
+from export import export_response
+from live import event_bus, format_sse
+from schemas import ReorderAlert
+from services import montecarlo
+from services.reorder_engine import build_reorder_alerts_batch, restamp_alert_dates
 
 router = APIRouter(prefix="/api/reorder", tags=["Reorder"])
 
 
-@router.get("/alerts")
+# Large lists are returned as ORJSONResponse directly: no jsonable_encoder or model validation
+# pass; response_model only documents the row shape
+@router.get("/alerts", response_model=list[ReorderAlert])
 async def reorder_alerts():
-    items = await crud.get_all_items()
-    return build_reorder_alerts(items)
+    alerts = await crud.get_analytics_rows("alert")
+    return ORJSONResponse(restamp_alert_dates(alerts))
+
+
+@router.get("/top", response_model=list[ReorderAlert])
+async def top_alerts(
+    k: int = Query(10, ge=1, le=500),
+    min_risk: int = Query(0, ge=0, le=100),
+    by: str = Query("risk", pattern="^(risk|stockout)$"),
+):
+    """Riskiest (or soonest to stock out) k items, read straight off the snapshot indexes."""
+    alerts = await crud.get_top_alerts(k, min_risk, by)
+    return ORJSONResponse(restamp_alert_dates(alerts))
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.get("/stream")
+async def stream_alert_changes(request: Request):
+    """Server-sent events carrying only the alert fields that changed."""
+    queue = event_bus.subscribe()
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/alerts/export")
+async def export_reorder_alerts(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(500, ge=1, le=5000),
+):
+    async def rows():
+        async for items in crud.iter_item_batches(batch_size):
+            yield build_reorder_alerts_batch(items)
+
+    return export_response(rows(), format, "reorder_alerts")
+
+
+@router.get("/monte-carlo")
+async def monte_carlo_stockout(
+    item_id: Optional[int] = None,
+    trials: int = Query(montecarlo.DEFAULT_TRIALS, ge=100, le=200_000),
+    horizon_days: int = Query(montecarlo.DEFAULT_HORIZON_DAYS, ge=1, le=730),
+    demand_cv: float = Query(montecarlo.DEFAULT_DEMAND_CV, ge=0, le=5),
+    lead_cv: float = Query(montecarlo.DEFAULT_LEAD_CV, ge=0, le=5),
+    seed: Optional[int] = Query(None, ge=0, description="Fix for reproducible samples"),
+):
+    if item_id is not None:
+        item = await crud.get_item_by_id(item_id)
+        if not item:
+            return {"error": "Item not found"}
+        items = [item]
+    else:
+        items = await crud.get_all_items()
+    suppliers = await crud.get_all_suppliers()
+    return await montecarlo.run_monte_carlo(
+        items,
+        suppliers,
+        trials=trials,
+        horizon_days=horizon_days,
+        demand_cv=demand_cv,
+        lead_cv=lead_cv,
+        seed=seed,
+    )
@@ -1,19 +1,43 @@
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
 import crud
-from schemas import SimulationInput
+from schemas import SimulationInput, SimulationResult, SimulationGridInput, SimulationGridResult
 from services.reorder import simulate_reorder
+from services.reorder_engine import simulate_reorder_grid
 
 router = APIRouter(prefix="/api/simulation", tags=["Simulation"])
 
+# Largest item x consumption x lead grid a single request may ask for
+MAX_GRID_CELLS = 2_000_000
 
-@router.post("/reorder")
+
+@router.post("/reorder", response_model=SimulationResult)
 async def run_simulation(sim: SimulationInput):
     item = await crud.get_item_by_id(sim.item_id)
     if not item:
-        return {"error": "Item not found"}
+        return ORJSONResponse({"error": "Item not found"})
     return simulate_reorder(
         item,
         sim.consumption_increase,
         sim.lead_time_increase,
         sim.rate_increase,
     )
+
+
+@router.post("/grid", response_model=SimulationGridResult)
+async def run_simulation_grid(sim: SimulationGridInput):
+    if sim.item_ids == "all":
+        items = await crud.get_all_items()
+    else:
+        items = await crud.get_items_by_ids(sim.item_ids)
+    if not items:
+        return ORJSONResponse({"error": "Item not found"})
+    cells = len(items) * len(sim.consumption_increase) * max(len(sim.lead_time_increase), len(sim.rate_increase))
+    if cells > MAX_GRID_CELLS:
+        return ORJSONResponse({"error": f"Grid too large ({cells} cells, max {MAX_GRID_CELLS})"})
+    return ORJSONResponse(simulate_reorder_grid(
+        items,
+        sim.consumption_increase,
+        sim.lead_time_increase,
+        sim.rate_increase,
+    ))
@@ -1,30 +1,26 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
 import crud
+from pagination import page_params, set_next_cursor
+from services.suppliers import supplier_performance_row
 
 router = APIRouter(prefix="/api/suppliers", tags=["Suppliers"])
 
 
 @router.get("")
-async def list_suppliers():
-    return await crud.get_all_suppliers()
+async def list_suppliers(response: Response, page: dict = Depends(page_params)):
+    rows = await crud.get_all_suppliers(**page)
+    set_next_cursor(response, rows, page["limit"])
+    return rows
 
 
 @router.get("/performance")
 async def supplier_performance():
     suppliers = await crud.get_all_suppliers()
-    performance = []
-    for s in suppliers:
-        late = s["actual_lead_days"] > s["promised_lead_days"]
-        grade = s.get("grade", "B")
-        performance.append({
-            "supplier_name": s["supplier_name"],
-            "item": s["item"],
-            "promised_lead_days": s["promised_lead_days"],
-            "actual_lead_days": s["actual_lead_days"],
-            "on_time": not late,
-            "price_change_percent": s["price_change_percent"],
-            "reliability_score": s["reliability_score"],
-            "contact": s["contact"],
-            "grade": grade,
-        })
-    return performance
+    stats = await crud.get_supplier_performance_stats()
+    return [supplier_performance_row(s, stats.get(s["supplier_name"])) for s in suppliers]
+
+
+@router.post("/performance/refresh")
+async def refresh_supplier_performance():
+    await crud.refresh_supplier_performance()
+    return await supplier_performance()
@@ -1,11 +1,44 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+from typing import Optional
 import crud
-from services.variance import build_variance_report
+from export import export_response
+from schemas import VarianceRow
+from services.variance import PERIOD_TYPES, build_variance_report
 
 router = APIRouter(prefix="/api/variance", tags=["Variance"])
 
+PERIOD_PATTERN = f"^({'|'.join(PERIOD_TYPES)})$"
 
-@router.get("/report")
+
+@router.get("/report", response_model=list[VarianceRow])
 async def variance_report():
-    items = await crud.get_all_items()
-    return build_variance_report(items)
+    return ORJSONResponse(await crud.get_analytics_rows("variance"))
+
+
+@router.post("/snapshots")
+async def capture_variance_snapshots(period_type: str = Query("month", pattern=PERIOD_PATTERN)):
+    """Snapshot every item into the open week/month; closed periods are never rewritten."""
+    return await crud.capture_variance_snapshots(period_type)
+
+
+@router.get("/trend")
+async def variance_trend(
+    period_type: str = Query("month", pattern=PERIOD_PATTERN),
+    periods: int = Query(12, ge=1, le=104),
+    item_id: Optional[int] = Query(None, description="Trend of one item instead of the catalog"),
+    window: int = Query(3, ge=1, le=52, description="Periods in the rolling waste_pct"),
+):
+    return await crud.get_variance_trend(period_type, periods, item_id, window)
+
+
+@router.get("/report/export")
+async def export_variance_report(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    batch_size: int = Query(500, ge=1, le=5000),
+):
+    async def rows():
+        async for items in crud.iter_item_batches(batch_size):
+            yield build_variance_report(items)
+
+    return export_response(rows(), format, "variance_report")
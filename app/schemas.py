@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from typing import Literal, Optional, Union
+from datetime import date, datetime
 
 
 # ── Inventory Item ──
@@ -20,6 +20,7 @@ class ItemBase(BaseModel):
     production_value: float
     worker_cost: float
     delay_history: int
+    min_order_qty: float = 0
 
 
 class ItemCreate(ItemBase):
@@ -42,6 +43,11 @@ class ItemUpdate(BaseModel):
     production_value: Optional[float] = None
     worker_cost: Optional[float] = None
     delay_history: Optional[int] = None
+    min_order_qty: Optional[float] = None
+
+
+class ItemBulkUpdate(ItemUpdate):
+    id: int
 
 
 class ItemOut(ItemBase):
@@ -56,8 +62,19 @@ class OrderBase(BaseModel):
     actual_total: float
 
 
+class OrderLineCreate(BaseModel):
+    item_id: int
+    planned_qty: float = Field(ge=0)
+    actual_qty: float = Field(0, ge=0)
+    planned_rate: Optional[float] = None   # defaults to the item's planned_rate
+    actual_rate: Optional[float] = None    # defaults to the item's actual_rate
+
+
 class OrderCreate(OrderBase):
-    pass
+    # With lines, the totals are computed from them and these are ignored
+    planned_total: float = 0
+    actual_total: float = 0
+    lines: list[OrderLineCreate] = Field(default_factory=list)
 
 
 class OrderOut(OrderBase):
@@ -105,6 +122,7 @@ class PurchaseOrderCreate(BaseModel):
     alternate_supplier: str = ""
     required_by_date: str = ""
     expected_delivery: str = ""
+    delivered_date: str = ""
     delivery_address: str = "Factory Gate, Main Production Unit"
     delivery_terms: str = "Ex-Works"
     payment_terms: str = "Net 30"
@@ -173,6 +191,42 @@ class ReorderAlert(BaseModel):
     planned_rate: float
     actual_qty: float
     actual_rate: float
+    stockout_date: str
+    order_by_date: str
+    delivery_date: str
+
+
+# ── Stock per Location ──
+class LocationStock(BaseModel):
+    item_id: int
+    location: str
+    current_stock: float
+    daily_consumption: float = 0
+    safety_stock: float = 0
+    lead_time_days: Optional[int] = None
+
+
+# ── Production Planning ──
+class ProductionPlanCreate(BaseModel):
+    item_id: int
+    qty: float = Field(gt=0)
+    due_date: date
+
+
+class BomLine(BaseModel):
+    parent_id: int
+    component_id: int
+    qty_per: float = Field(gt=0)
+    scrap_pct: float = Field(0, ge=0)
+    offset_days: int = Field(0, ge=0)
+
+
+# ── Consumption Event ──
+class ConsumptionEvent(BaseModel):
+    item_id: int
+    qty: float
+    ts: Optional[datetime] = None
+    source: str = ""
 
 
 # ── Simulation ──
@@ -183,6 +237,13 @@ class SimulationInput(BaseModel):
     rate_increase: float = 0
 
 
+class SimulationGridInput(BaseModel):
+    item_ids: Union[list[int], Literal["all"]] = "all"
+    consumption_increase: list[float] = Field(default_factory=lambda: [0], min_length=1)
+    lead_time_increase: list[int] = Field(default_factory=lambda: [0], min_length=1)
+    rate_increase: list[float] = Field(default_factory=lambda: [0], min_length=1)
+
+
 class SimulationResult(BaseModel):
     item_name: str
     original_daily: float
@@ -201,3 +262,18 @@ class SimulationResult(BaseModel):
     simulated_cost: float
     cost_impact: float
     status: str
+
+
+class SimulationGridItem(BaseModel):
+    id: int
+    name: str
+
+
+class SimulationGridResult(BaseModel):
+    items: list[SimulationGridItem]
+    consumption_increase: list[float]
+    lead_time_increase: list[int]
+    rate_increase: list[float]
+    reorder_qty: list[list[list[float]]]
+    coverage_days: list[list[float]]
+    cost_impact: list[list[float]]
@@ -0,0 +1,50 @@
+from datetime import datetime
+from services.reorder_engine import build_reorder_alerts_batch
+from services.variance import variance_row
+from metrics import timed
+
+# Running portfolio totals kept alongside the per-item snapshots
+TOTAL_FIELDS = ("planned_cost", "actual_cost", "items_at_risk", "risk_score_sum", "item_count")
+
+
+@timed("build_item_analytics")
+def build_item_analytics(items: list, now: datetime = None) -> list:
+    """Everything the read endpoints derive from an item, computed once per write."""
+    alerts = build_reorder_alerts_batch(items, now)
+    docs = []
+    for item, alert in zip(items, alerts):
+        variance = variance_row(item)
+        coverage_days = alert["coverage_days"]
+        loss_per_day = item["production_value"] * 8
+        docs.append({
+            "id": item["id"],
+            "alert": alert,
+            "variance": variance,
+            "production_loss": {
+                "hours_until_stop": round(coverage_days * 8, 1),
+                "loss_per_hour": item["production_value"],
+                "loss_per_day": loss_per_day,
+                "worker_idle_cost": item["worker_cost"],
+                "total_loss": loss_per_day + item["worker_cost"],
+                "coverage_days": coverage_days,
+            },
+            "totals": {
+                "planned_cost": variance["planned_amount"],
+                "actual_cost": variance["actual_amount"],
+                "items_at_risk": 1 if alert["suggested_reorder_qty"] > 0 else 0,
+                "risk_score_sum": alert["risk_score"],
+                "item_count": 1,
+            },
+        })
+    return docs
+
+
+def totals_delta(old_docs: list, new_docs: list) -> dict:
+    delta = dict.fromkeys(TOTAL_FIELDS, 0)
+    for doc in new_docs:
+        for field in TOTAL_FIELDS:
+            delta[field] += doc["totals"][field]
+    for doc in old_docs:
+        for field in TOTAL_FIELDS:
+            delta[field] -= doc["totals"][field]
+    return delta
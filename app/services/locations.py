@@ -0,0 +1,148 @@
+import numpy as np
+from metrics import timed
+from services.reorder_engine import round_like_builtin
+
+# Per-location fields read by the planner; lead_time_days falls back to the item's
+LOCATION_COLUMNS = ("current_stock", "daily_consumption", "safety_stock", "lead_time_days")
+
+# Transfer slices smaller than this are float noise from the cumulative sums
+MIN_TRANSFER_QTY = 1e-6
+
+
+def pack_locations(rows: list) -> dict:
+    cols = {
+        col: np.fromiter((row[col] for row in rows), dtype=np.float64, count=len(rows))
+        for col in LOCATION_COLUMNS
+    }
+    cols["item_id"] = np.fromiter((row["item_id"] for row in rows), dtype=np.int64, count=len(rows))
+    return cols
+
+
+def plan_transfers(item_ids: np.ndarray, need: np.ndarray, surplus: np.ndarray, coverage: np.ndarray):
+    """Match each item's surplus locations to its short ones, greedily and all items at once.
+
+    Within an item the lowest-coverage location draws first, from the best-covered
+    location first. Every item gets its own stretch of one number line, needs and
+    surpluses are laid end to end along it, and each slice where a need and a
+    surplus overlap is one transfer. Returns (to_rows, from_rows, qty).
+    """
+    need_order = np.lexsort((coverage, item_ids))
+    surplus_order = np.lexsort((-coverage, item_ids))
+    item_keys, group = np.unique(item_ids[need_order], return_inverse=True)
+    need_sorted = need[need_order]
+    surplus_sorted = surplus[surplus_order]
+
+    need_total = np.bincount(group, weights=need_sorted, minlength=len(item_keys))
+    surplus_total = np.bincount(group, weights=surplus_sorted, minlength=len(item_keys))
+    span = np.maximum(need_total, surplus_total)
+    base = np.cumsum(span) - span
+    movable_end = base + np.minimum(need_total, surplus_total)
+
+    # Both orders are sorted by item first, so group applies to either
+    need_end = base[group] + np.cumsum(need_sorted) - (np.cumsum(need_total) - need_total)[group]
+    surplus_end = base[group] + np.cumsum(surplus_sorted) - (np.cumsum(surplus_total) - surplus_total)[group]
+
+    cuts = np.unique(np.concatenate((need_end, surplus_end, base, movable_end)))
+    lo, hi = cuts[:-1], cuts[1:]
+    mid = (lo + hi) / 2
+    owner = np.searchsorted(base, mid, side="right") - 1
+    keep = (mid < movable_end[owner]) & (hi - lo > MIN_TRANSFER_QTY)
+    mid, qty = mid[keep], (hi - lo)[keep]
+
+    to_rows = need_order[np.searchsorted(need_end, mid, side="right")]
+    from_rows = surplus_order[np.searchsorted(surplus_end, mid, side="right")]
+
+    # Float noise can split one (to, from) pair across neighbouring slices
+    pairs, inverse = np.unique(to_rows * len(item_ids) + from_rows, return_inverse=True)
+    qty = np.bincount(inverse, weights=qty)
+    return pairs // len(item_ids), pairs % len(item_ids), qty
+
+
+@timed("build_location_plan")
+def build_location_plan(rows: list) -> dict:
+    """Per-location reorder needs, inter-location transfers and the per-item roll-up.
+
+    rows: one per (item, location) with the LOCATION_COLUMNS plus item_id, location
+    and the item's name and supplier_name. A location only gives away stock above
+    its own reorder level; whatever transfers can't cover is the external order.
+    """
+    if not rows:
+        return {"items": [], "transfers": [], "locations": []}
+    cols = pack_locations(rows)
+    item_ids = cols["item_id"]
+    current = cols["current_stock"]
+    daily = cols["daily_consumption"]
+
+    reorder_level = daily * cols["lead_time_days"] + cols["safety_stock"]
+    need = np.maximum(reorder_level - current, 0)
+    surplus = np.maximum(current - reorder_level, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage_days = np.where(daily > 0, round_like_builtin(current / daily, 1), 999.0)
+
+    to_rows, from_rows, qty = plan_transfers(item_ids, need, surplus, coverage_days)
+    transfer_in = np.bincount(to_rows, weights=qty, minlength=len(rows))
+    transfer_out = np.bincount(from_rows, weights=qty, minlength=len(rows))
+    external = np.maximum(need - transfer_in, 0)
+
+    item_keys, first_rows, group = np.unique(item_ids, return_index=True, return_inverse=True)
+
+    def per_item(values):
+        return np.round(np.bincount(group, weights=values, minlength=len(item_keys)), 2).tolist()
+
+    items = [
+        {
+            "item_id": item_id,
+            "name": rows[first]["name"],
+            "supplier_name": rows[first]["supplier_name"],
+            "locations": count,
+            "current_stock": stock,
+            "reorder_level": level,
+            "need_qty": need_qty,
+            "transfer_qty": moved,
+            "external_qty": ext,
+        }
+        for item_id, first, count, stock, level, need_qty, moved, ext in zip(
+            item_keys.tolist(),
+            first_rows.tolist(),
+            np.bincount(group, minlength=len(item_keys)).tolist(),
+            per_item(current),
+            per_item(reorder_level),
+            per_item(need),
+            per_item(transfer_in),
+            per_item(external),
+        )
+    ]
+    transfers = [
+        {
+            "item_id": rows[to]["item_id"],
+            "from_location": rows[src]["location"],
+            "to_location": rows[to]["location"],
+            "qty": q,
+        }
+        for to, src, q in zip(to_rows.tolist(), from_rows.tolist(), np.round(qty, 2).tolist())
+    ]
+    locations = [
+        {
+            "item_id": row["item_id"],
+            "location": row["location"],
+            "current_stock": row["current_stock"],
+            "reorder_level": level,
+            "need_qty": need_qty,
+            "surplus_qty": spare,
+            "coverage_days": cover,
+            "transfer_in": moved_in,
+            "transfer_out": moved_out,
+            "external_qty": ext,
+        }
+        for row, level, need_qty, spare, cover, moved_in, moved_out, ext in zip(
+            rows,
+            np.round(reorder_level, 2).tolist(),
+            np.round(need, 2).tolist(),
+            np.round(surplus, 2).tolist(),
+            coverage_days.tolist(),
+            np.round(transfer_in, 2).tolist(),
+            np.round(transfer_out, 2).tolist(),
+            np.round(external, 2).tolist(),
+        )
+    ]
+    return {"items": items, "transfers": transfers, "locations": locations}
@@ -0,0 +1,116 @@
+import asyncio
+import math
+import multiprocessing
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+DEFAULT_TRIALS = 20_000
+DEFAULT_HORIZON_DAYS = 180
+DEFAULT_DEMAND_CV = 0.25
+DEFAULT_LEAD_CV = 0.3
+# Demand samples held in memory at once (trials x days); ~16 MB per float64 array
+MAX_CHUNK_SAMPLES = 2_000_000
+
+_executor = None
+_executor_workers = os.cpu_count() or 1
+
+
+def _gamma(rng, mean: float, cv: float, size):
+    # Gamma keeps samples non-negative; cv == 0 collapses to the mean
+    if mean <= 0:
+        return np.zeros(size)
+    if cv <= 0:
+        return np.full(size, float(mean))
+    shape = 1 / cv ** 2
+    return rng.gamma(shape, mean / shape, size)
+
+
+def _date_or_none(now: datetime, day, horizon_days: int):
+    if day is None or day >= horizon_days:
+        return None
+    return (now + timedelta(days=int(day))).isoformat()
+
+
+def simulate_item_stockout(item: dict, supplier: dict = None, trials: int = DEFAULT_TRIALS,
+                           horizon_days: int = DEFAULT_HORIZON_DAYS, demand_cv: float = DEFAULT_DEMAND_CV,
+                           lead_cv: float = DEFAULT_LEAD_CV, seed: int = None, now: datetime = None) -> dict:
+    """Sample daily demand and replenishment lead time for one item.
+
+    stockout_probability is the share of trials where stock runs out before an
+    order placed today would arrive. p50_stockout_date is the median stockout
+    date; p95_stockout_date is the date stock still lasts to in 95% of trials.
+    Dates are None when that percentile falls beyond the horizon.
+    """
+    now = now or datetime.now()
+    rng = np.random.default_rng(None if seed is None else [seed, item["id"]])
+
+    # Supplier history stretches the quoted lead time when they deliver late
+    lead_scale = 1.0
+    if supplier and supplier.get("promised_lead_days", 0) > 0:
+        lead_scale = supplier["actual_lead_days"] / supplier["promised_lead_days"]
+    lead_days = np.ceil(_gamma(rng, item["lead_time_days"] * lead_scale, lead_cv, trials))
+
+    # Sample demand a block of trials at a time so memory stays flat however large
+    # trials x horizon_days gets; only each trial's stockout day is kept
+    stockout_day = np.empty(trials, dtype=np.int64)
+    chunk = max(1, MAX_CHUNK_SAMPLES // horizon_days)
+    for start in range(0, trials, chunk):
+        stop = min(start + chunk, trials)
+        demand = _gamma(rng, item["daily_consumption"], demand_cv, (stop - start, horizon_days))
+        ran_out = np.cumsum(demand, axis=1) > item["current_stock"]
+        # First day the cumulative demand exceeds stock; horizon_days when it never does
+        stockout_day[start:stop] = np.where(ran_out.any(axis=1), ran_out.argmax(axis=1), horizon_days)
+
+    p50_day, p05_day = np.percentile(stockout_day, [50, 5], method="lower")
+    return {
+        "id": item["id"],
+        "name": item["name"],
+        "trials": trials,
+        "stockout_probability": round(float(np.mean(stockout_day < lead_days)), 4),
+        "p50_stockout_date": _date_or_none(now, p50_day, horizon_days),
+        "p95_stockout_date": _date_or_none(now, p05_day, horizon_days),
+        "p50_lead_days": float(np.percentile(lead_days, 50)),
+        "p95_lead_days": float(np.percentile(lead_days, 95)),
+    }
+
+
+def _simulate_chunk(jobs: list, options: dict) -> list:
+    return [simulate_item_stockout(item, supplier, **options) for item, supplier in jobs]
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # Spawned workers: forking a process that already runs Motor and executor
+        # threads can leave a child holding a lock no thread will ever release
+        _executor = ProcessPoolExecutor(max_workers=_executor_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+_executor_workers = os.cpu_count() or 1
+
+
+async def run_monte_carlo(items: list, suppliers: list, **options) -> list:
+    """Fan items out over the process pool so the event loop stays free."""
+    if not items:
+        return []
+    by_name = {s["supplier_name"]: s for s in suppliers}
+    jobs = [(item, by_name.get(item["supplier_name"])) for item in items]
+    options.setdefault("now", datetime.now())
+
+    executor = get_executor()
+    # A few chunks per worker amortises the pickling cost without starving the pool
+    chunk_size = max(1, math.ceil(len(jobs) / (_executor_workers * 4)))
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(executor, _simulate_chunk, jobs[i:i + chunk_size], options)
+        for i in range(0, len(jobs), chunk_size)
+    ))
+    return [row for chunk in chunks for row in chunk]
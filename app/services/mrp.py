@@ -0,0 +1,174 @@
+import numpy as np
+from datetime import date
+from metrics import timed
+
+# Shortfalls below this are float residue of the netting, not a reason to order
+MIN_PLANNED_QTY = 1e-6
+DEFAULT_ORDER_CYCLE_DAYS = 7
+
+
+def _column(items: list, field: str, default=0) -> np.ndarray:
+    return np.fromiter((item.get(field, default) for item in items), dtype=np.float64, count=len(items))
+
+
+def _day_index(value: str, start: date) -> int:
+    try:
+        return (date.fromisoformat(value[:10]) - start).days
+    except (TypeError, ValueError):
+        # Open PO without a usable expected date: assume it can arrive today
+        return 0
+
+
+def build_mrp_inputs(items: list, requirements: list, receipts: list, horizon_days: int, start: date):
+    """Gross requirements, scheduled receipts and on-hand stock as items x days arrays.
+
+    requirements: explode_requirements rows; items without one consume their
+                  daily_consumption every day.
+    receipts:     open PO quantities, {"item_name", "date", "qty"}; orders dated before
+                  start are treated as already received.
+    """
+    index = {item["id"]: row for row, item in enumerate(items)}
+    by_name = {item["name"]: row for row, item in enumerate(items)}
+    gross = np.repeat(_column(items, "daily_consumption")[:, None], horizon_days, axis=1)
+    for requirement in requirements:
+        row = index.get(requirement["item_id"])
+        if row is not None:
+            gross[row] = requirement["daily_qty"]
+
+    scheduled = np.zeros((len(items), horizon_days))
+    on_order = np.zeros(len(items))
+    for receipt in receipts:
+        row = by_name.get(receipt["item_name"])
+        day = _day_index(receipt["date"], start)
+        # An order already past its expected date is taken as received: its quantity
+        # is in current_stock and must not be counted again as incoming
+        if row is None or day < 0:
+            continue
+        on_order[row] += receipt["qty"]
+        if day < horizon_days:
+            scheduled[row, day] += receipt["qty"]
+    # crud.create_purchase_order adds an order to current_stock straight away; take
+    # open orders back out so they arrive on their expected date instead. Not clamped:
+    # stock already promised to later receipts can leave on hand below zero
+    on_hand = _column(items, "current_stock") - on_order
+    return gross, scheduled, on_hand
+
+
+def _day_dates(start: date, days: np.ndarray) -> list:
+    return np.datetime_as_string(np.datetime64(start, "D") + days.astype("timedelta64[D]"), unit="D").tolist()
+
+
+@timed("net_requirements")
+def net_requirements(items: list, gross: np.ndarray, receipts: np.ndarray, on_hand: np.ndarray,
+                     order_cycle_days: int = DEFAULT_ORDER_CYCLE_DAYS) -> dict:
+    """Time-phased netting for every item at once; rows are items, columns day buckets.
+
+    Each day: projected on hand = previous + scheduled receipts - gross requirements.
+    When that would fall below safety stock, a planned receipt lands the same day
+    covering the shortfall plus the next order_cycle_days - 1 days of requirements
+    (1 is lot-for-lot), raised to min_order_qty. Planned releases are the receipts
+    moved earlier by lead_time_days; any that would have been released before
+    day 0 are past due and counted on day 0.
+    """
+    n, horizon_days = gross.shape
+    safety = _column(items, "safety_stock")
+    min_qty = _column(items, "min_order_qty")
+    lead = _column(items, "lead_time_days").astype(np.int64)
+
+    # Day-major copies keep each day's slice contiguous
+    gross_by_day = np.ascontiguousarray(gross.T)
+    receipts_by_day = np.ascontiguousarray(receipts.T)
+    cumulative = np.cumsum(gross_by_day, axis=0)
+    projected = np.empty((horizon_days, n))
+    planned = np.zeros((horizon_days, n))
+    available = on_hand.astype(np.float64)
+    # Lot sizing makes each day depend on the last, so walk the days and vectorize over items
+    for day in range(horizon_days):
+        available = available + receipts_by_day[day] - gross_by_day[day]
+        shortfall = safety - available
+        short = shortfall > MIN_PLANNED_QTY
+        if short.any():
+            cover_to = min(day + order_cycle_days - 1, horizon_days - 1)
+            upcoming = cumulative[cover_to] - cumulative[day]
+            qty = np.where(short, np.maximum(shortfall + upcoming, min_qty), 0.0)
+            planned[day] = qty
+            available = available + qty
+        projected[day] = available
+    projected, planned = projected.T, planned.T
+
+    rows, receipt_days = np.nonzero(planned)
+    release_days = receipt_days - lead[rows]
+    releases = np.zeros((n, horizon_days))
+    np.add.at(releases, (rows, np.maximum(release_days, 0)), planned[rows, receipt_days])
+    return {
+        "projected": projected,
+        "planned_receipts": planned,
+        "planned_releases": releases,
+        "order_rows": rows,
+        "receipt_days": receipt_days,
+        "release_days": release_days,
+    }
+
+
+def planned_order_docs(items: list, netted: dict, gross: np.ndarray, receipts: np.ndarray,
+                       on_hand: np.ndarray, start: date) -> list:
+    """One summary document per item with its planned orders (no day buckets)."""
+    rows = netted["order_rows"]
+    qty = np.round(netted["planned_receipts"][rows, netted["receipt_days"]], 2).tolist()
+    receipt_dates = _day_dates(start, netted["receipt_days"])
+    release_dates = _day_dates(start, np.maximum(netted["release_days"], 0))
+    past_due = (netted["release_days"] < 0).tolist()
+
+    orders = [[] for _ in items]
+    for row, release_date, receipt_date, q, late in zip(rows.tolist(), release_dates, receipt_dates, qty, past_due):
+        orders[row].append({"release_date": release_date, "receipt_date": receipt_date, "qty": q, "past_due": late})
+
+    projected = netted["projected"]
+    return [
+        {
+            "item_id": item["id"],
+            "name": item["name"],
+            "supplier_name": item["supplier_name"],
+            "on_hand": oh,
+            "gross_total": g,
+            "receipts_total": r,
+            "planned_total": p,
+            "min_projected": low,
+            "ending_projected": end,
+            "planned_orders": item_orders,
+        }
+        for item, oh, g, r, p, low, end, item_orders in zip(
+            items,
+            np.round(on_hand, 2).tolist(),
+            np.round(gross.sum(axis=1), 2).tolist(),
+            np.round(receipts.sum(axis=1), 2).tolist(),
+            np.round(netted["planned_receipts"].sum(axis=1), 2).tolist(),
+            np.round(projected.min(axis=1), 2).tolist(),
+            np.round(projected[:, -1], 2).tolist(),
+            orders,
+        )
+    ]
+
+
+def item_buckets(netted: dict, gross: np.ndarray, receipts: np.ndarray, row: int, start: date) -> list:
+    """Day-by-day MRP record of one item."""
+    horizon_days = gross.shape[1]
+    columns = zip(
+        _day_dates(start, np.arange(horizon_days)),
+        np.round(gross[row], 2).tolist(),
+        np.round(receipts[row], 2).tolist(),
+        np.round(netted["projected"][row], 2).tolist(),
+        np.round(netted["planned_receipts"][row], 2).tolist(),
+        np.round(netted["planned_releases"][row], 2).tolist(),
+    )
+    return [
+        {
+            "date": day,
+            "gross_requirements": g,
+            "scheduled_receipts": r,
+            "projected_on_hand": p,
+            "planned_receipts": pr,
+            "planned_releases": rel,
+        }
+        for day, g, r, p, pr, rel in columns
+    ]
@@ -1,5 +1,6 @@
 import math
 from datetime import datetime, timedelta
+from metrics import timed
 
 
 def calc_reorder(item: dict) -> dict:
@@ -45,6 +46,39 @@ def calc_risk_score(item: dict) -> int:
     return score
 
 
+def risk_score_expr() -> dict:
+    """calc_risk_score as a MongoDB aggregation expression over an item document."""
+    reorder_level = {"$add": [{"$multiply": ["$daily_consumption", "$lead_time_days"]}, "$safety_stock"]}
+    planned_amt = {"$multiply": ["$planned_qty", "$planned_rate"]}
+    actual_amt = {"$multiply": ["$actual_qty", "$actual_rate"]}
+    return {"$let": {
+        "vars": {"reorder_level": reorder_level, "planned_amt": planned_amt, "actual_amt": actual_amt},
+        "in": {"$let": {
+            "vars": {
+                "stock_ratio": {"$cond": [
+                    {"$gt": ["$$reorder_level", 0]},
+                    {"$divide": ["$current_stock", "$$reorder_level"]},
+                    1,
+                ]},
+                "variance": {"$subtract": ["$$actual_amt", "$$planned_amt"]},
+            },
+            "in": {"$min": [
+                {"$round": [{"$add": [
+                    {"$cond": [{"$lt": ["$$stock_ratio", 1]}, {"$multiply": [{"$subtract": [1, "$$stock_ratio"]}, 40]}, 0]},
+                    {"$multiply": [{"$divide": ["$lead_time_days", 7]}, 20]},
+                    {"$cond": [
+                        {"$and": [{"$gt": ["$$variance", 0]}, {"$gt": ["$$planned_amt", 0]}]},
+                        {"$min": [{"$multiply": [{"$divide": ["$$variance", "$$planned_amt"]}, 100]}, 20]},
+                        0,
+                    ]},
+                    {"$min": [{"$multiply": ["$delay_history", 4]}, 20]},
+                ]}, 0]},
+                100,
+            ]},
+        }},
+    }}
+
+
 def calc_production_loss(item: dict) -> dict:
     reorder_data = calc_reorder(item)
     coverage_days = reorder_data["coverage_days"]
@@ -64,6 +98,7 @@ def calc_production_loss(item: dict) -> dict:
     }
 
 
+@timed("build_reorder_alerts")
 def build_reorder_alerts(items: list) -> list:
     alerts = []
     for item in items:
@@ -96,6 +131,7 @@ def build_reorder_alerts(items: list) -> list:
     return alerts
 
 
+@timed("simulate_reorder")
 def simulate_reorder(item: dict, consumption_increase: float, lead_time_increase: int, rate_increase: float) -> dict:
     original_daily = item["daily_consumption"]
     sim_daily = original_daily * (1 + consumption_increase / 100)
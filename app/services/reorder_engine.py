@@ -0,0 +1,194 @@
+import numpy as np
+from datetime import datetime
+from metrics import timed
+
+# Columnar counterpart of services/reorder.py. The per-item functions there stay
+# the reference implementation; everything here must produce the same numbers.
+
+ITEM_COLUMNS = (
+    "current_stock",
+    "daily_consumption",
+    "lead_time_days",
+    "safety_stock",
+    "planned_qty",
+    "planned_rate",
+    "actual_qty",
+    "actual_rate",
+    "delay_history",
+)
+
+
+def pack_items(items: list) -> dict:
+    """Pack the numeric item fields into one float64 array per column."""
+    return {
+        col: np.fromiter((item[col] for item in items), dtype=np.float64, count=len(items))
+        for col in ITEM_COLUMNS
+    }
+
+
+def round_like_builtin(values: np.ndarray, digits: int) -> np.ndarray:
+    # np.round scales by 10**digits before rounding, which disagrees with the
+    # builtin round() on values sitting next to a tie; defer those few to round().
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for idx in zip(*np.nonzero(near_tie)):
+        rounded[idx] = round(float(values[idx]), digits)
+    return rounded
+
+
+def _iso_dates(now: datetime, days: np.ndarray) -> list:
+    # datetime.isoformat() drops the fraction when microsecond == 0
+    unit = "us" if now.microsecond else "s"
+    base = np.datetime64(now, unit)
+    return np.datetime_as_string(base + days.astype("timedelta64[D]"), unit=unit).tolist()
+
+
+def calc_reorder_batch(cols: dict, now: datetime = None) -> dict:
+    now = now or datetime.now()
+    daily = cols["daily_consumption"]
+    lead = cols["lead_time_days"]
+    current = cols["current_stock"]
+
+    reorder_level = daily * lead + cols["safety_stock"]
+    reorder_qty = reorder_level - current
+    with np.errstate(divide="ignore", invalid="ignore"):
+        coverage_days = np.where(daily > 0, round_like_builtin(current / daily, 1), 999.0)
+
+    whole_days = np.trunc(coverage_days).astype(np.int64)
+    lead_days = lead.astype(np.int64)
+    order_by_days = np.maximum(0, whole_days - lead_days)
+
+    return {
+        "reorder_level": reorder_level,
+        "reorder_qty": reorder_qty,
+        "coverage_days": coverage_days,
+        "stockout_date": _iso_dates(now, whole_days),
+        "order_by_date": _iso_dates(now, order_by_days),
+        "delivery_date": _iso_dates(now, order_by_days + lead_days),
+    }
+
+
+def calc_risk_score_batch(cols: dict, reorder: dict) -> np.ndarray:
+    reorder_level = reorder["reorder_level"]
+    planned_amt = cols["planned_qty"] * cols["planned_rate"]
+    actual_amt = cols["actual_qty"] * cols["actual_rate"]
+    variance = actual_amt - planned_amt
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stock_ratio = np.where(reorder_level > 0, cols["current_stock"] / reorder_level, 1.0)
+        variance_risk = np.where(
+            (variance > 0) & (planned_amt > 0),
+            np.minimum((variance / planned_amt) * 100, 20),
+            0.0,
+        )
+    stock_risk = np.where(stock_ratio < 1, (1 - stock_ratio) * 40, 0.0)
+    lead_risk = (cols["lead_time_days"] / 7) * 20
+    delay_risk = np.minimum(cols["delay_history"] * 4, 20)
+
+    # np.rint rounds half to even, same as the builtin round()
+    score = np.rint(stock_risk + lead_risk + variance_risk + delay_risk)
+    return np.minimum(score, 100).astype(np.int64)
+
+
+@timed("restamp_alert_dates")
+def restamp_alert_dates(alerts: list, now: datetime = None) -> list:
+    """Recompute the three dates of stored alert rows relative to now."""
+    if not alerts:
+        return alerts
+    now = now or datetime.now()
+    whole_days = np.trunc(np.fromiter((a["coverage_days"] for a in alerts), np.float64, len(alerts))).astype(np.int64)
+    lead_days = np.fromiter((a["lead_time"] for a in alerts), np.int64, len(alerts))
+    order_by_days = np.maximum(0, whole_days - lead_days)
+    dates = zip(
+        _iso_dates(now, whole_days),
+        _iso_dates(now, order_by_days),
+        _iso_dates(now, order_by_days + lead_days),
+    )
+    for alert, (stockout, order_by, delivery) in zip(alerts, dates):
+        alert["stockout_date"] = stockout
+        alert["order_by_date"] = order_by
+        alert["delivery_date"] = delivery
+    return alerts
+
+
+@timed("build_reorder_alerts_batch")
+def build_reorder_alerts_batch(items: list, now: datetime = None) -> list:
+    if not items:
+        return []
+    cols = pack_items(items)
+    reorder = calc_reorder_batch(cols, now)
+    risk = calc_risk_score_batch(cols, reorder).tolist()
+    reorder_level = reorder["reorder_level"].tolist()
+    reorder_qty = reorder["reorder_qty"].tolist()
+    coverage_days = reorder["coverage_days"].tolist()
+
+    return [
+        {
+            "id": item["id"],
+            "name": item["name"],
+            "unit": item["unit"],
+            "current_stock": item["current_stock"],
+            "daily_usage": item["daily_consumption"],
+            "lead_time": item["lead_time_days"],
+            "safety_stock": item["safety_stock"],
+            "reorder_level": reorder_level[i],
+            "suggested_reorder_qty": reorder_qty[i],
+            "coverage_days": coverage_days[i],
+            "risk_score": risk[i],
+            "supplier_name": item["supplier_name"],
+            "production_value": item["production_value"],
+            "worker_cost": item["worker_cost"],
+            "delay_history": item["delay_history"],
+            "planned_qty": item["planned_qty"],
+            "planned_rate": item["planned_rate"],
+            "actual_qty": item["actual_qty"],
+            "actual_rate": item["actual_rate"],
+            "stockout_date": reorder["stockout_date"][i],
+            "order_by_date": reorder["order_by_date"][i],
+            "delivery_date": reorder["delivery_date"][i],
+        }
+        for i, item in enumerate(items)
+    ]
+
+
+@timed("simulate_reorder_grid")
+def simulate_reorder_grid(items: list, consumption_increase: list, lead_time_increase: list, rate_increase: list) -> dict:
+    """simulate_reorder over every item x parameter combination in one broadcast.
+
+    Each output keeps only the axes it depends on:
+    reorder_qty[item][consumption][lead], coverage_days[item][consumption],
+    cost_impact[item][rate].
+    """
+    cols = pack_items(items)
+    consumption = np.asarray(consumption_increase, dtype=np.float64)
+    lead = np.asarray(lead_time_increase, dtype=np.float64)
+    rate = np.asarray(rate_increase, dtype=np.float64)
+
+    sim_daily = cols["daily_consumption"][:, None] * (1 + consumption[None, :] / 100)
+    sim_lead = cols["lead_time_days"][:, None] + lead[None, :]
+
+    # round() on the reorder level is half-to-even, same as np.rint
+    sim_reorder_level = np.rint(sim_daily[:, :, None] * sim_lead[:, None, :] + cols["safety_stock"][:, None, None])
+    sim_reorder_qty = sim_reorder_level - cols["current_stock"][:, None, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sim_coverage_days = np.where(
+            sim_daily > 0,
+            round_like_builtin(cols["current_stock"][:, None] / sim_daily, 1),
+            999.0,
+        )
+
+    sim_rate = cols["actual_rate"][:, None] * (1 + rate[None, :] / 100)
+    sim_cost = cols["actual_qty"][:, None] * sim_rate
+    orig_cost = cols["actual_qty"] * cols["actual_rate"]
+    cost_impact = round_like_builtin(sim_cost - orig_cost[:, None], 2)
+
+    return {
+        "items": [{"id": item["id"], "name": item["name"]} for item in items],
+        "consumption_increase": consumption.tolist(),
+        "lead_time_increase": lead.astype(np.int64).tolist(),
+        "rate_increase": rate.tolist(),
+        "reorder_qty": sim_reorder_qty.tolist(),
+        "coverage_days": sim_coverage_days.tolist(),
+        "cost_impact": cost_impact.tolist(),
+    }
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from services.reorder_engine import build_reorder_alerts_batch
+from metrics import timed
+
+DEFAULT_GST_PERCENT = 18
+
+
+@timed("plan_consolidated_orders")
+def plan_consolidated_orders(items: list, suppliers: list, window_days: int = None,
+                             respect_moq: bool = True, now: datetime = None) -> list:
+    """Group every item that needs reordering into one multi-line PO per supplier.
+
+    window_days: only include items whose order_by_date falls within this many days.
+    respect_moq: raise each line to the item's min_order_qty when it has one.
+    """
+    now = now or datetime.now()
+    cutoff = (now + timedelta(days=window_days)).isoformat() if window_days is not None else None
+    contacts = {s["supplier_name"]: s.get("contact", "") for s in suppliers}
+
+    by_supplier = {}
+    for item, alert in zip(items, build_reorder_alerts_batch(items, now)):
+        qty = alert["suggested_reorder_qty"]
+        if qty <= 0 or (cutoff is not None and alert["order_by_date"] > cutoff):
+            continue
+        if respect_moq:
+            qty = max(qty, item.get("min_order_qty", 0))
+        line_total = qty * item["actual_rate"]
+        by_supplier.setdefault(item["supplier_name"], []).append({
+            "item_id": item["id"],
+            "item_name": item["name"],
+            "item_code": f"ITM-{item['id']:03d}",
+            "unit": item["unit"],
+            "current_stock": item["current_stock"],
+            "reorder_level": alert["reorder_level"],
+            "order_qty": qty,
+            "unit_rate": item["actual_rate"],
+            "gst_percent": DEFAULT_GST_PERCENT,
+            "line_total": line_total,
+            "order_by_date": alert["order_by_date"][:10],
+            "delivery_date": alert["delivery_date"][:10],
+        })
+
+    orders = []
+    for supplier_name, lines in by_supplier.items():
+        subtotal = sum(line["line_total"] for line in lines)
+        required_by = min(line["delivery_date"] for line in lines)
+        orders.append({
+            "po_date": now.date().isoformat(),
+            "requested_by": "Auto-replenishment",
+            "department": "Production",
+            "priority": "High",
+            "status": "Draft",
+            "supplier_name": supplier_name,
+            "supplier_contact": contacts.get(supplier_name, ""),
+            # When the first line is due in; MRP reads this as the receipt date
+            "required_by_date": required_by,
+            "expected_delivery": required_by,
+            "lines": lines,
+            "line_count": len(lines),
+            "total_amount": round(subtotal * (1 + DEFAULT_GST_PERCENT / 100), 2),
+        })
+    return orders
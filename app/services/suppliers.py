@@ -0,0 +1,57 @@
+ON_TIME_TARGET = 0.9
+GRADE_THRESHOLDS = ((9.0, "A+"), (8.5, "A"), (7.0, "B+"), (6.0, "B"), (5.0, "C"))
+
+
+def calc_reliability_score(on_time_rate: float, price_drift_percent: float) -> float:
+    # 70% delivery punctuality, 30% price stability (a 20% drift scores zero)
+    drift_penalty = min(abs(price_drift_percent or 0) / 20, 1)
+    return round(10 * (0.7 * on_time_rate + 0.3 * (1 - drift_penalty)), 1)
+
+
+def grade_for(score: float) -> str:
+    for threshold, grade in GRADE_THRESHOLDS:
+        if score >= threshold:
+            return grade
+    return "D"
+
+
+def supplier_performance_row(supplier: dict, stats: dict = None) -> dict:
+    """Supplier card; measured PO history wins over the hand-entered fields when there is any."""
+    row = {
+        "supplier_name": supplier["supplier_name"],
+        "item": supplier["item"],
+        "promised_lead_days": supplier["promised_lead_days"],
+        "actual_lead_days": supplier["actual_lead_days"],
+        "on_time": supplier["actual_lead_days"] <= supplier["promised_lead_days"],
+        "price_change_percent": supplier["price_change_percent"],
+        "reliability_score": supplier["reliability_score"],
+        "contact": supplier["contact"],
+        "grade": supplier.get("grade", "B"),
+        "po_count": 0,
+        "on_time_rate": None,
+        "mean_lead_days": None,
+        "p95_lead_days": None,
+        "source": "manual",
+    }
+    if not stats or stats.get("on_time_rate") is None:
+        return row
+
+    # No two POs for the same item means no measured drift; that isn't evidence of
+    # stable prices, so keep the hand-entered figure rather than scoring it as zero
+    drift = stats.get("price_drift_percent")
+    if drift is None:
+        drift = row["price_change_percent"]
+    score = calc_reliability_score(stats["on_time_rate"], drift)
+    row.update({
+        "actual_lead_days": stats["mean_lead_days"],
+        "on_time": stats["on_time_rate"] >= ON_TIME_TARGET,
+        "price_change_percent": drift,
+        "reliability_score": score,
+        "grade": grade_for(score),
+        "po_count": stats["po_count"],
+        "on_time_rate": stats["on_time_rate"],
+        "mean_lead_days": stats["mean_lead_days"],
+        "p95_lead_days": stats["p95_lead_days"],
+        "source": "purchase_orders",
+    })
+    return row
@@ -1,4 +1,8 @@
 import math
+from datetime import datetime, timedelta, timezone
+from metrics import timed
+
+PERIOD_TYPES = ("week", "month")
 
 
 def calc_variance(item: dict) -> dict:
@@ -23,25 +27,70 @@ def calc_variance(item: dict) -> dict:
     }
 
 
+def variance_row(item: dict) -> dict:
+    v = calc_variance(item)
+    return {
+        "id": item["id"],
+        "name": item["name"],
+        "unit": item["unit"],
+        "planned_qty": item["planned_qty"],
+        "planned_rate": item["planned_rate"],
+        "planned_amount": v["planned_amount"],
+        "actual_qty": item["actual_qty"],
+        "actual_rate": item["actual_rate"],
+        "actual_amount": v["actual_amount"],
+        "variance": v["variance"],
+        "price_variance": v["price_variance"],
+        "qty_variance": v["qty_variance"],
+        "efficiency_pct": v["efficiency_pct"],
+        "waste_pct": v["waste_pct"],
+        "status": v["status"],
+    }
+
+
+@timed("build_variance_report")
 def build_variance_report(items: list) -> list:
-    report = []
-    for item in items:
-        v = calc_variance(item)
-        report.append({
-            "id": item["id"],
-            "name": item["name"],
-            "unit": item["unit"],
-            "planned_qty": item["planned_qty"],
-            "planned_rate": item["planned_rate"],
-            "planned_amount": v["planned_amount"],
-            "actual_qty": item["actual_qty"],
-            "actual_rate": item["actual_rate"],
-            "actual_amount": v["actual_amount"],
-            "variance": v["variance"],
-            "price_variance": v["price_variance"],
-            "qty_variance": v["qty_variance"],
-            "efficiency_pct": v["efficiency_pct"],
-            "waste_pct": v["waste_pct"],
-            "status": v["status"],
-        })
-    return report
+    return [variance_row(item) for item in items]
+
+
+# ── Period snapshots ──
+
+def period_bounds(period_type: str, when: datetime) -> tuple:
+    """(label, start) of the ISO week or calendar month containing `when`, in UTC."""
+    if period_type not in PERIOD_TYPES:
+        raise ValueError(f"Unknown period type {period_type!r}; expected one of {PERIOD_TYPES}")
+    day = when.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if period_type == "week":
+        start = day - timedelta(days=day.weekday())
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}", start
+    start = day.replace(day=1)
+    return start.strftime("%Y-%m"), start
+
+
+def periods_back(period_type: str, start: datetime, count: int) -> datetime:
+    if period_type == "week":
+        return start - timedelta(weeks=count)
+    month_index = start.year * 12 + start.month - 1 - count
+    return start.replace(year=month_index // 12, month=month_index % 12 + 1)
+
+
+def variance_amount_exprs() -> dict:
+    """calc_variance's amounts as Mongo expressions over a document with the item qty/rate fields."""
+    return {
+        "planned_amount": {"$multiply": ["$planned_qty", "$planned_rate"]},
+        "actual_amount": {"$multiply": ["$actual_qty", "$actual_rate"]},
+        "price_variance": {"$multiply": [{"$subtract": ["$actual_rate", "$planned_rate"]}, "$actual_qty"]},
+        "qty_variance": {"$multiply": [{"$subtract": ["$actual_qty", "$planned_qty"]}, "$planned_rate"]},
+        # Actual usage valued at planned rates, so quantities in different units can be summed
+        "standard_actual_amount": {"$multiply": ["$actual_qty", "$planned_rate"]},
+    }
+
+
+def waste_pct_expr(planned_amount: str, standard_actual_amount: str) -> dict:
+    # Same as calc_variance for a single item: 100 - planned_qty / actual_qty * 100
+    return {"$cond": [
+        {"$gt": [standard_actual_amount, 0]},
+        {"$round": [{"$subtract": [100, {"$multiply": [{"$divide": [planned_amount, standard_actual_amount]}, 100]}]}, 1]},
+        0,
+    ]}
@@ -0,0 +1,91 @@
+import random
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from services.bom import BomCycleError, check_acyclic, explode_requirements
+
+START = date(2026, 10, 18)
+
+
+def _due(days: int) -> str:
+    return (START + timedelta(days=days)).isoformat()
+
+
+def _reference(bom_lines: list, plans: list, horizon_days: int) -> dict:
+    # Recursive per-plan explosion; leaves are the components nothing is built from
+    children = {}
+    for line in bom_lines:
+        children.setdefault(line["parent_id"], []).append(line)
+    required = {}
+
+    def explode(item_id, qty, day):
+        if item_id not in children:
+            required.setdefault(item_id, np.zeros(horizon_days))[max(day, 0)] += qty
+            return
+        for line in children[item_id]:
+            per = line["qty_per"] * (1 + line.get("scrap_pct", 0) / 100)
+            explode(line["component_id"], qty * per, day - line.get("offset_days", 0))
+
+    for plan in plans:
+        day = max((date.fromisoformat(plan["due_date"]) - START).days, 0)
+        if day < horizon_days:
+            explode(plan["item_id"], plan["qty"], day)
+    return required
+
+
+def test_shared_subassembly_collects_demand_from_every_parent():
+    # Shirt and Kurta both use a Panel (1 and 2 per); a Panel takes 1.5 m of fabric
+    lines = [
+        {"parent_id": 1, "component_id": 3, "qty_per": 1},
+        {"parent_id": 2, "component_id": 3, "qty_per": 2},
+        {"parent_id": 3, "component_id": 10, "qty_per": 1.5, "offset_days": 1},
+        {"parent_id": 1, "component_id": 11, "qty_per": 6},
+    ]
+    plans = [{"item_id": 1, "qty": 10, "due_date": _due(3)}, {"item_id": 2, "qty": 5, "due_date": _due(3)}]
+    rows = {row["item_id"]: row for row in explode_requirements(lines, plans, 5, START)["requirements"]}
+    assert rows.keys() == {10, 11}
+    assert rows[10]["daily_qty"] == [0, 0, 30.0, 0, 0]
+    assert rows[11]["daily_qty"] == [0, 0, 0, 60.0, 0]
+
+
+def test_matches_recursive_reference():
+    rng = random.Random(3)
+    # Random layered DAG: parents only point at higher-numbered nodes
+    lines = {}
+    for parent in range(1, 40):
+        for component in rng.sample(range(parent + 1, 60), 3):
+            lines[(parent, component)] = {
+                "parent_id": parent,
+                "component_id": component,
+                "qty_per": rng.choice([0.5, 1, 2, 3]),
+                "scrap_pct": rng.choice([0, 5]),
+                "offset_days": rng.choice([0, 0, 1, 4]),
+            }
+    lines = list(lines.values())
+    plans = [{"item_id": rng.randint(1, 15), "qty": rng.randint(1, 20), "due_date": _due(rng.randint(-5, 40))}
+             for _ in range(50)]
+    horizon_days = 30
+    result = {row["item_id"]: row["daily_qty"] for row in explode_requirements(lines, plans, horizon_days, START)["requirements"]}
+    expected = _reference(lines, plans, horizon_days)
+    assert result.keys() == {item_id for item_id, row in expected.items() if row.sum() > 0}
+    for item_id, row in result.items():
+        assert row == pytest.approx(np.round(expected[item_id], 4).tolist())
+
+
+def test_cycle_is_rejected():
+    lines = [
+        {"parent_id": 1, "component_id": 2, "qty_per": 1},
+        {"parent_id": 2, "component_id": 3, "qty_per": 1},
+        {"parent_id": 3, "component_id": 1, "qty_per": 1},
+    ]
+    with pytest.raises(BomCycleError):
+        check_acyclic(lines)
+    with pytest.raises(BomCycleError):
+        explode_requirements(lines, [{"item_id": 1, "qty": 1, "due_date": _due(0)}], 5, START)
+
+
+def test_plans_past_horizon_are_left_out():
+    lines = [{"parent_id": 1, "component_id": 2, "qty_per": 1}]
+    plans = [{"item_id": 1, "qty": 4, "due_date": _due(-3)}, {"item_id": 1, "qty": 9, "due_date": _due(5)}]
+    result = explode_requirements(lines, plans, 5, START)["requirements"]
+    assert [(row["item_id"], row["daily_qty"]) for row in result] == [(2, [4.0, 0, 0, 0, 0])]
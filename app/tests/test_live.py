@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from live import EventBus, _changed_fields
+
+
+def test_publish_reaches_every_subscriber():
+    bus = EventBus()
+    first, second = bus.subscribe(), bus.subscribe()
+    bus.publish({"type": "alert", "id": 1})
+    assert first.get_nowait() == second.get_nowait() == {"type": "alert", "id": 1}
+
+
+def test_unsubscribed_queue_gets_nothing():
+    bus = EventBus()
+    queue = bus.subscribe()
+    bus.unsubscribe(queue)
+    bus.publish({"type": "alert", "id": 1})
+    assert queue.empty()
+    assert not bus.subscribers
+
+
+def test_full_queue_is_dropped_and_ended():
+    bus = EventBus(queue_size=2)
+    slow, fast = bus.subscribe(), bus.subscribe()
+    bus.publish({"type": "alert", "id": 1})
+    bus.publish({"type": "alert", "id": 2})
+    fast.get_nowait()
+    bus.publish({"type": "alert", "id": 3})
+    # The lagging subscriber's backlog is discarded and replaced by the end marker
+    assert slow not in bus.subscribers and fast in bus.subscribers
+    assert slow.get_nowait() is None
+    with pytest.raises(asyncio.QueueEmpty):
+        slow.get_nowait()
+
+
+def test_changed_fields_first_sighting_reports_everything():
+    alert = {"id": 1, "coverage_days": 4.5, "stockout_date": "2026-03-18T09:00:00"}
+    assert _changed_fields({}, alert) == alert
+
+
+def test_changed_fields_only_reports_differences():
+    old = {"id": 1, "coverage_days": 4.5, "risk_score": 60}
+    new = {"id": 1, "coverage_days": 3.0, "risk_score": 60}
+    assert _changed_fields(old, new) == {"coverage_days": 3.0}
+
+
+def test_changed_fields_dates_compare_by_day():
+    old = {"stockout_date": "2026-03-18T09:00:00.000001", "order_by_date": "2026-03-11T09:00:00"}
+    new = {"stockout_date": "2026-03-18T17:45:12.5", "order_by_date": "2026-03-12T09:00:00"}
+    assert _changed_fields(old, new) == {"order_by_date": "2026-03-12T09:00:00"}
+
+
+class _FakeStream:
+    def __init__(self, changes):
+        self.changes = changes
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for change in self.changes:
+            yield change
+
+
+def test_item_change_from_another_worker_invalidates_cache(monkeypatch):
+    import live
+    from cache import items_cache
+
+    item = {"_id": "a1", "id": 1, "name": "Cotton Fabric"}
+    monkeypatch.setattr(live.items_col, "watch", lambda **kwargs: _FakeStream([
+        {"operationType": "update", "fullDocument": item},
+    ]))
+    items_cache.entries["first-page"] = (float("inf"), [])
+    generation = items_cache.generation
+    asyncio.run(live.AlertFeed(EventBus())._watch_items())
+    assert items_cache.generation > generation
+    assert not items_cache.entries
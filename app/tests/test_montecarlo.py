@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime
+import pytest
+from services import montecarlo
+
+NOW = datetime(2026, 3, 14, 9, 0)
+ITEM = {"id": 7, "name": "Cotton Fabric", "supplier_name": "Rajesh Textiles",
+        "lead_time_days": 7, "daily_consumption": 5, "current_stock": 60}
+SUPPLIER = {"supplier_name": "Rajesh Textiles", "promised_lead_days": 5, "actual_lead_days": 6}
+
+
+def _simulate(**options):
+    return montecarlo.simulate_item_stockout(ITEM, SUPPLIER, trials=3_000, horizon_days=120, seed=11, now=NOW, **options)
+
+
+def test_same_seed_gives_same_result():
+    assert _simulate() == _simulate()
+
+
+def test_different_seed_changes_samples():
+    other = montecarlo.simulate_item_stockout(ITEM, SUPPLIER, trials=3_000, horizon_days=120, seed=12, now=NOW)
+    assert other != _simulate()
+
+
+@pytest.mark.parametrize("chunk_samples", [1, 120 * 7, 10 ** 9])
+def test_chunking_does_not_change_result(monkeypatch, chunk_samples):
+    expected = _simulate()
+    monkeypatch.setattr(montecarlo, "MAX_CHUNK_SAMPLES", chunk_samples)
+    assert _simulate() == expected
+
+
+def test_process_pool_matches_in_process():
+    items = [{**ITEM, "id": item_id} for item_id in range(1, 6)]
+    options = {"trials": 500, "horizon_days": 60, "seed": 3, "now": NOW}
+    try:
+        pooled = asyncio.run(montecarlo.run_monte_carlo(items, [SUPPLIER], **options))
+    finally:
+        montecarlo.shutdown_executor()
+    assert pooled == [montecarlo.simulate_item_stockout(item, SUPPLIER, **options) for item in items]
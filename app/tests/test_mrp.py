@@ -0,0 +1,95 @@
+import random
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from services.mrp import build_mrp_inputs, net_requirements, planned_order_docs
+
+START = date(2026, 10, 18)
+
+
+def _item(**fields) -> dict:
+    return {
+        "id": 1,
+        "name": "Cotton Fabric",
+        "supplier_name": "Rajesh Textiles",
+        "current_stock": 200,
+        "daily_consumption": 40,
+        "safety_stock": 0,
+        "lead_time_days": 5,
+        "min_order_qty": 0,
+        **fields,
+    }
+
+
+def _plan(items: list, receipts: list, horizon_days: int = 3) -> tuple:
+    gross, scheduled, on_hand = build_mrp_inputs(items, [], receipts, horizon_days, START)
+    netted = net_requirements(items, gross, scheduled, on_hand, order_cycle_days=1)
+    return netted, planned_order_docs(items, netted, gross, scheduled, on_hand, START)
+
+
+def test_overdue_po_is_not_counted_twice():
+    items = [_item()]
+    overdue = [{"item_name": "Cotton Fabric", "date": "2024-03-01", "qty": 1000}]
+    with_po, _ = _plan(items, overdue)
+    without_po, _ = _plan(items, [])
+    assert with_po["projected"].tolist() == without_po["projected"].tolist() == [[160, 120, 80]]
+
+
+def test_open_po_arrives_on_its_date_without_clamping_on_hand():
+    # 300 of the 200 in stock is an order still due on day 2, so on hand starts at -100
+    items = [_item()]
+    receipts = [{"item_name": "Cotton Fabric", "date": "2026-10-20", "qty": 300}]
+    gross, scheduled, on_hand = build_mrp_inputs(items, [], receipts, 3, START)
+    assert on_hand.tolist() == [-100]
+    assert scheduled.tolist() == [[0, 0, 300]]
+    netted, docs = _plan(items, receipts)
+    # Short from day 0: a past-due order covers it, and the receipt still lands on day 2
+    assert netted["planned_receipts"][0, 0] == 140
+    assert docs[0]["planned_orders"][0] == {
+        "release_date": "2026-10-18", "receipt_date": "2026-10-18", "qty": 140.0, "past_due": True,
+    }
+    assert np.all(netted["projected"] >= 0)
+
+
+def test_zero_stock_item_orders_on_day_zero():
+    items = [_item(current_stock=0, daily_consumption=10, safety_stock=20, lead_time_days=2, min_order_qty=50)]
+    netted, docs = _plan(items, [], horizon_days=4)
+    # Day 0 needs 30 to reach safety stock, raised to the 50 minimum
+    assert netted["planned_receipts"].tolist() == [[50, 0, 0, 50]]
+    assert docs[0]["planned_orders"][0]["past_due"] is True
+    assert netted["projected"].min() >= 20
+
+
+def _reference_netting(item: dict, gross: list, receipts: list, on_hand: float, cycle: int) -> list:
+    # One item, one day at a time, as the netting is described on paper
+    planned, available = [], on_hand
+    for day in range(len(gross)):
+        available += receipts[day] - gross[day]
+        qty = 0.0
+        if item["safety_stock"] - available > 1e-6:
+            upcoming = sum(gross[day + 1:min(day + cycle, len(gross))])
+            qty = max(item["safety_stock"] - available + upcoming, item["min_order_qty"])
+        available += qty
+        planned.append(qty)
+    return planned
+
+
+@pytest.mark.parametrize("cycle", [1, 7])
+def test_vectorized_netting_matches_per_item_loop(cycle):
+    rng = random.Random(cycle)
+    items = [
+        _item(id=i, name=f"Item {i}", current_stock=rng.choice([0, rng.uniform(0, 400)]),
+              daily_consumption=rng.uniform(0, 30), safety_stock=rng.choice([0, rng.uniform(0, 60)]),
+              lead_time_days=rng.randint(0, 10), min_order_qty=rng.choice([0, 100]))
+        for i in range(200)
+    ]
+    receipts = [
+        {"item_name": f"Item {rng.randrange(200)}", "date": (START + timedelta(days=rng.randint(-10, 40))).isoformat(),
+         "qty": rng.uniform(10, 200)}
+        for _ in range(150)
+    ]
+    gross, scheduled, on_hand = build_mrp_inputs(items, [], receipts, 30, START)
+    netted = net_requirements(items, gross, scheduled, on_hand, order_cycle_days=cycle)
+    for row, item in enumerate(items):
+        expected = _reference_netting(item, gross[row].tolist(), scheduled[row].tolist(), on_hand[row], cycle)
+        assert netted["planned_receipts"][row].tolist() == pytest.approx(expected)
@@ -0,0 +1,84 @@
+import random
+from datetime import datetime
+import numpy as np
+import pytest
+import services.reorder as reference
+from services.reorder_engine import build_reorder_alerts_batch, round_like_builtin
+
+FROZEN_NOW = datetime(2026, 3, 14, 9, 26, 53, 589793)
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return FROZEN_NOW
+
+
+def _random_item(rng: random.Random, item_id: int) -> dict:
+    return {
+        "id": item_id,
+        "name": f"Item {item_id}",
+        "unit": "kg",
+        "planned_qty": rng.choice([0, rng.uniform(0, 500), rng.randint(0, 500)]),
+        "planned_rate": round(rng.uniform(0, 300), 2),
+        "actual_qty": rng.choice([0, rng.uniform(0, 500), rng.randint(0, 500)]),
+        "actual_rate": round(rng.uniform(0, 300), 2),
+        "current_stock": rng.choice([0, round(rng.uniform(0, 1000), 2), rng.randint(0, 1000)]),
+        "daily_consumption": rng.choice([0, round(rng.uniform(0.1, 60), 2), rng.randint(1, 60)]),
+        "lead_time_days": rng.randint(0, 14),
+        "safety_stock": rng.choice([0, round(rng.uniform(0, 200), 2)]),
+        "supplier_name": "Rajesh Textiles",
+        "production_value": 4200,
+        "worker_cost": 1800,
+        "delay_history": rng.randint(0, 8),
+    }
+
+
+def _edge_items() -> list:
+    base = _random_item(random.Random(1), 0)
+    cases = [
+        {"daily_consumption": 0},
+        {"planned_qty": 0},
+        {"planned_qty": 0, "actual_qty": 0},
+        {"current_stock": 0},
+        {"lead_time_days": 0, "safety_stock": 0, "daily_consumption": 0},
+        # current / daily lands on .x5 ties
+        {"current_stock": 0.25, "daily_consumption": 1},
+        {"current_stock": 2.675, "daily_consumption": 1},
+        {"current_stock": 1.05, "daily_consumption": 1},
+        {"current_stock": 10.5, "daily_consumption": 7},
+        {"current_stock": 36.45, "daily_consumption": 9},
+    ]
+    return [{**base, "id": i + 1, **case} for i, case in enumerate(cases)]
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(reference, "datetime", _FrozenDatetime)
+
+
+@pytest.mark.parametrize("items", [
+    pytest.param(_edge_items(), id="edge-cases"),
+    pytest.param([_random_item(random.Random(42), i) for i in range(20_000)], id="random-20k"),
+])
+def test_batch_alerts_match_reference(frozen_clock, items):
+    expected = reference.build_reorder_alerts(items)
+    actual = build_reorder_alerts_batch(items, FROZEN_NOW)
+    assert len(actual) == len(expected)
+    for want, got in zip(expected, actual):
+        assert got.keys() == want.keys()
+        assert got == want, {k: (want[k], got[k]) for k in want if got[k] != want[k]}
+
+
+def test_dates_drop_fraction_when_microsecond_is_zero(monkeypatch):
+    now = FROZEN_NOW.replace(microsecond=0)
+    monkeypatch.setattr(_FrozenDatetime, "now", classmethod(lambda cls, tz=None: now))
+    monkeypatch.setattr(reference, "datetime", _FrozenDatetime)
+    items = _edge_items()
+    assert build_reorder_alerts_batch(items, now) == reference.build_reorder_alerts(items)
+
+
+def test_round_like_builtin_on_ties():
+    values = np.array([0.25, 0.35, 2.675, 1.005, 0.125, -0.25, 1.15, 10.5 / 7, 36.45 / 9])
+    for digits in (1, 2):
+        assert round_like_builtin(values, digits).tolist() == [round(v, digits) for v in values.tolist()]
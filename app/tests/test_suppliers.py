@@ -0,0 +1,25 @@
+from services.suppliers import supplier_performance_row
+
+SUPPLIER = {
+    "supplier_name": "Rajesh Textiles",
+    "item": "Cotton Fabric",
+    "promised_lead_days": 5,
+    "actual_lead_days": 6,
+    "price_change_percent": 12.0,
+    "reliability_score": 7.0,
+    "contact": "",
+}
+STATS = {"po_count": 4, "on_time_rate": 1.0, "mean_lead_days": 5.0, "p95_lead_days": 6.0}
+
+
+def test_measured_drift_is_scored():
+    row = supplier_performance_row(SUPPLIER, {**STATS, "price_drift_percent": 2.0})
+    assert row["price_change_percent"] == 2.0
+    assert row["reliability_score"] == 9.7
+
+
+def test_missing_drift_keeps_manual_figure_instead_of_zero():
+    row = supplier_performance_row(SUPPLIER, {**STATS, "price_drift_percent": None})
+    assert row["price_change_percent"] == 12.0
+    # 12% of the 20% cap costs 0.3 * 0.6 of the score; zero drift would have scored 10.0
+    assert row["reliability_score"] == 8.2
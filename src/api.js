@@ -21,29 +21,45 @@ function transformItem(b) {
   };
 }
 
+// ── Follow X-Next-Cursor until the list endpoint runs out of pages ──
+async function fetchAllPages(path) {
+  const rows = [];
+  let after = null;
+  do {
+    const url = after === null ? `${API_BASE}${path}` : `${API_BASE}${path}?after=${after}`;
+    const res = await fetch(url);
+    rows.push(...(await res.json()));
+    after = res.headers.get("X-Next-Cursor");
+  } while (after !== null);
+  return rows;
+}
+
 // ── API Fetchers ──
 
 export async function fetchItems() {
-  const res = await fetch(`${API_BASE}/items`);
-  const data = await res.json();
+  const data = await fetchAllPages("/items");
   return data.map(transformItem);
 }
 
 export async function fetchOrders() {
-  const res = await fetch(`${API_BASE}/orders`);
-  const data = await res.json();
+  const data = await fetchAllPages("/orders");
   // Transform backend order → frontend order shape
   return data.map(b => ({
     id: b.order_code,
+    orderId: b.id,
     date: b.start_date,
     planned: b.planned_total,
     actual: b.actual_total,
   }));
 }
 
+export async function fetchOrderVariance(orderId) {
+  const res = await fetch(`${API_BASE}/orders/${orderId}/variance`);
+  return res.json();
+}
+
 export async function fetchSuppliers() {
-  const res = await fetch(`${API_BASE}/suppliers`);
-  const data = await res.json();
+  const data = await fetchAllPages("/suppliers");
   return data.map(b => ({
     name: b.supplier_name,
     item: b.item,
@@ -93,10 +109,27 @@ export async function deleteItem(id) {
   return res.json();
 }
 
+// crypto.randomUUID only exists in secure contexts (https or localhost)
+function idempotencyKey() {
+  if (globalThis.crypto?.randomUUID) return crypto.randomUUID();
+  const bytes = new Uint8Array(16);
+  if (globalThis.crypto?.getRandomValues) {
+    crypto.getRandomValues(bytes);
+  } else {
+    for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+  }
+  // RFC 4122 version 4 layout, same shape as randomUUID
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, b => b.toString(16).padStart(2, "0")).join("");
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 export async function createPurchaseOrder(po) {
   const res = await fetch(`${API_BASE}/purchase-orders/create`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    // Retries of this request (by us or a proxy) reuse the key and are no-ops server-side
+    headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKey() },
     body: JSON.stringify(po),
   });
   return res.json();
@@ -110,3 +143,53 @@ export async function runSimulation(params) {
   });
   return res.json();
 }
+
+export async function runSimulationGrid(params) {
+  const res = await fetch(`${API_BASE}/simulation/grid`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(params),
+  });
+  return res.json();
+}
+
+// ── Live reorder alert diffs (server-sent events); returns an unsubscribe function ──
+export function subscribeAlertChanges(onEvent) {
+  const source = new EventSource(`${API_BASE}/reorder/stream`);
+  source.onmessage = e => onEvent(JSON.parse(e.data));
+  return () => source.close();
+}
+
+// Alert fields that mirror an item field, as [key] or [key, subkey] in the transformItem shape
+const ALERT_ITEM_PATHS = {
+  name: ["name"],
+  unit: ["unit"],
+  current_stock: ["inventory", "current"],
+  daily_usage: ["inventory", "daily"],
+  lead_time: ["inventory", "lead"],
+  safety_stock: ["inventory", "safety"],
+  planned_qty: ["planned", "qty"],
+  planned_rate: ["planned", "rate"],
+  actual_qty: ["actual", "qty"],
+  actual_rate: ["actual", "rate"],
+  supplier_name: ["supplier"],
+  production_value: ["productionValue"],
+  worker_cost: ["workerCost"],
+  delay_history: ["delayHistory"],
+};
+
+// ── Fold one subscribeAlertChanges event into a fetchItems() list ──
+export function applyAlertChange(items, event) {
+  if (event.type === "deleted") return items.filter(i => i.id !== event.id);
+  const index = items.findIndex(i => i.id === event.id);
+  // An item this list hasn't seen is only usable when the event carries every field
+  if (index === -1 && !("name" in event.changes)) return items;
+  let item = index === -1 ? { id: event.id, planned: {}, actual: {}, inventory: {} } : items[index];
+  for (const [field, value] of Object.entries(event.changes)) {
+    const path = ALERT_ITEM_PATHS[field];
+    if (!path) continue;
+    const [key, sub] = path;
+    item = sub ? { ...item, [key]: { ...item[key], [sub]: value } } : { ...item, [key]: value };
+  }
+  return index === -1 ? [...items, item] : items.map((existing, i) => (i === index ? item : existing));
+}
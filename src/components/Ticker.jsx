@@ -1,12 +1,14 @@
 import { useState, useEffect } from "react";
 import { calcVariance, calcReorder, calcRiskScore } from "../data/staticData";
-import { fetchItems } from "../api";
+import { applyAlertChange, fetchItems, subscribeAlertChanges } from "../api";
 
 export default function Ticker() {
   const [items, setItems] = useState([]);
 
   useEffect(() => {
     fetchItems().then(setItems);
+    // Keep the list current from the alert stream instead of refetching it
+    return subscribeAlertChanges(event => setItems(prev => applyAlertChange(prev, event)));
   }, []);
 
   if (items.length === 0) return null;